@@ -1,33 +1,41 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 
+from app_data import disaster_data
+from chart_payload import ROW_BUDGET, BoundedChart, bounded_box, bounded_histogram, bounded_map, bounded_scatter
+from data_export import EXPORT_FORMATS, ExportCache, export_file_name, export_mime
+from data_loader import derived
+from data_refresher import start as start_refresher, status_caption
+from figure_cache import FigureCache, filter_signature
+from profiling import Profiler
+
+# Columns shown in the data table until the user picks others
+TABLE_COLUMNS = [
+    'DisNo.', 'Start Year', 'Start Month', 'Disaster Type', 'Disaster Subtype', 'Location',
+    'Magnitude', 'Magnitude Scale', 'Total Deaths', 'Total Affected', "Total Damage ('000 US$)",
+    'Predicted_Deadly', 'Predicted_Severity',
+]
+
 st.set_page_config(page_title="Saudi Disasters Dashboard", layout="wide")
 st.title("Saudi Disasters Dashboard")
+# Opt-in section timings (DASHBOARD_PROFILE=1 or ?profile=1)
+profiler = Profiler("disasters")
+# Reloads changed data files off the request path
+start_refresher()
 
-# Load datasets
-df = pd.read_csv("merged_output.csv")
-df_severity = pd.read_csv("disaster_predictions_with_severity.csv")
-df_deadly = pd.read_csv("disaster_predictions_logreg.csv")
-
-# Normalize column names
-df_severity.columns = df_severity.columns.str.strip().str.lower()
-df_deadly.columns = df_deadly.columns.str.strip().str.lower()
-
-# Find the correct prediction columns
-severity_col = [col for col in df_severity.columns if 'severity' in col][0]
-deadly_col = [col for col in df_deadly.columns if 'deadly' in col][0]
-
-# Add predictions to main dataframe
-df['Predicted_Severity'] = df_severity[severity_col].values
-df['Predicted_Deadly'] = df_deadly[deadly_col].map({1: 'Yes', 0: 'No'}).values
-
-# Clean numeric columns
-df['Start Year'] = pd.to_numeric(df['Start Year'], errors='coerce')
-df['Total Deaths'] = pd.to_numeric(df['Total Deaths'], errors='coerce').fillna(0)
+# Load datasets (mapped from the shared snapshot, only the columns used here)
+with profiler.section("load"):
+    df, load_stats, full, city_index, filter_engine, cube, year_frames = disaster_data()
 
 # Sidebar filters
 st.sidebar.header("Filters")
+st.sidebar.caption(
+    f"Loaded from {load_stats.source} in {load_stats.load_seconds:.2f}s, "
+    f"cache saved {load_stats.seconds_saved:.1f}s, typed columns saved "
+    f"{load_stats.memory_saved_bytes / 1e6:.1f} MB and loading only the used columns "
+    f"{load_stats.projection_saved_bytes / 1e6:.1f} MB"
+)
+st.sidebar.caption(status_caption(load_stats))
 min_year, max_year = int(df['Start Year'].min()), int(df['Start Year'].max())
 year_range = st.sidebar.slider("Start Year", min_year, max_year, (min_year, max_year))
 
@@ -37,151 +45,209 @@ disaster_types = st.sidebar.multiselect(
     sorted(df['Disaster Type'].dropna().unique())
 )
 
-cities_all = pd.Series(sum([loc.split(", ") for loc in df['Location'].dropna()], [])).unique()
-cities = st.sidebar.multiselect("Cities", sorted(cities_all), None)
+cities = st.sidebar.multiselect("Cities", city_index.cities, None)
 
-# Apply filters
-filtered_df = df[
-    (df['Start Year'] >= year_range[0]) &
-    (df['Start Year'] <= year_range[1]) &
-    (df['Disaster Type'].isin(disaster_types))
-]
-if cities:
-    filtered_df = filtered_df[filtered_df['Location'].str.contains('|'.join(cities), na=False)]
+row_budget = st.sidebar.number_input(
+    "Chart row budget", min_value=100, value=ROW_BUDGET, step=1000,
+    help="Above this many rows, the map, scatter, box and histogram charts are binned or sampled on the server",
+)
 
-if filtered_df.empty:
+# Apply filters: aggregates come from the cube, row-level charts from the bitmap selection
+with profiler.section("filters"):
+    cube_slice = cube.slice(year_range, disaster_types, cities)
+    selection = filter_engine.select(year_range, disaster_types, cities)
+
+if selection.empty:
     st.warning("No data available for selected filters.")
+    profiler.render()
     st.stop()
 
 # Key metrics
 st.header("Key Metrics and Insights")
-col1, col2, col3, col4 = st.columns(4)
-col5, col6, col7, col8 = st.columns(4)
-
-total_deaths = int(filtered_df['Total Deaths'].sum())
-avg_deaths = round(filtered_df['Total Deaths'].mean(), 2)
-most_common_type = filtered_df['Disaster Type'].mode()[0]
-deadliest_event = filtered_df.loc[filtered_df['Total Deaths'].idxmax()]
-unique_subgroups = filtered_df['Disaster Subgroup'].nunique()
-most_frequent_city = filtered_df['Location'].mode()[0]
-earliest_year = int(filtered_df['Start Year'].min())
-latest_year = int(filtered_df['Start Year'].max())
-most_freq_subgroup = filtered_df['Disaster Subgroup'].mode()[0]
-
-col1.metric("Total Deaths", total_deaths)
-col2.metric("Avg Deaths/Event", avg_deaths)
-col3.metric("Most Common Disaster", most_common_type)
-col4.metric("Deadliest Event", f"{deadliest_event['Disaster Type']} ({int(deadliest_event['Total Deaths'])})")
-col5.metric("Unique Subgroups", unique_subgroups)
-col6.metric("Most Frequent City", most_frequent_city)
-col7.metric("Earliest Year", earliest_year)
-col8.metric("Latest Year", latest_year)
-st.metric("Most Frequent Subgroup", most_freq_subgroup)
+with profiler.section("key_metrics"):
+    col1, col2, col3, col4 = st.columns(4)
+    col5, col6, col7, col8 = st.columns(4)
+
+    total_deaths = int(cube_slice.total('Deaths'))
+    avg_deaths = round(cube_slice.mean('Deaths'), 2)
+    most_common_type = cube_slice.mode('Disaster Type')
+    deadliest_event = df.iloc[cube_slice.deadliest_row()]
+    unique_subgroups = cube_slice.nunique('Disaster Subgroup')
+    most_frequent_city = cube_slice.most_frequent_location()
+    earliest_year = int(cube_slice.cells['Start Year'].min())
+    latest_year = int(cube_slice.cells['Start Year'].max())
+    most_freq_subgroup = cube_slice.mode('Disaster Subgroup')
+
+    col1.metric("Total Deaths", total_deaths)
+    col2.metric("Avg Deaths/Event", avg_deaths)
+    col3.metric("Most Common Disaster", most_common_type)
+    col4.metric("Deadliest Event", f"{deadliest_event['Disaster Type']} ({int(deadliest_event['Total Deaths'])})")
+    col5.metric("Unique Subgroups", unique_subgroups)
+    col6.metric("Most Frequent City", most_frequent_city or "N/A")
+    col7.metric("Earliest Year", earliest_year)
+    col8.metric("Latest Year", latest_year)
+    st.metric("Most Frequent Subgroup", most_freq_subgroup)
 
 # EDA Visualizations
-st.header("Exploratory Data Analysis")
+# Charts live in tabs that only run when selected; built figures are shared
+# across sessions and reruns, keyed by chart id and filter combination
+figure_cache = derived("figure_cache", load_stats, FigureCache)
+signature = filter_signature(year_range, disaster_types, cities)
 
-st.plotly_chart(px.line(filtered_df.groupby('Start Year')['Total Deaths'].sum().reset_index(),
-                        x='Start Year', y='Total Deaths', title="Deaths Over Time"), use_container_width=True)
 
-st.plotly_chart(px.area(filtered_df.groupby('Start Year').size().reset_index(name='Count'),
-                        x='Start Year', y='Count', title="Disasters Over Time"), use_container_width=True)
+def show_chart(chart_id, build, container=st):
+    # Timed with the figure's serialization, which is often the larger cost
+    with profiler.section("chart." + (chart_id[0] if isinstance(chart_id, tuple) else chart_id)):
+        chart = figure_cache.get(chart_id, signature, build)
+        if isinstance(chart, BoundedChart):
+            container.plotly_chart(chart.figure, use_container_width=True)
+            container.caption(chart.caption())
+        else:
+            container.plotly_chart(chart, use_container_width=True)
 
-deaths_year = filtered_df.groupby('Start Year')['Total Deaths'].sum().cumsum().reset_index()
-deaths_year.columns = ['Start Year', 'Cumulative Deaths']
-st.plotly_chart(px.line(deaths_year, x='Start Year', y='Cumulative Deaths', title="Cumulative Deaths"), use_container_width=True)
 
-type_counts = filtered_df['Disaster Type'].value_counts().reset_index()
-type_counts.columns = ['Disaster Type', 'Count']
-st.plotly_chart(px.pie(type_counts, names='Disaster Type', values='Count', title="Disaster Type Distribution"), use_container_width=True)
+def cumulative_deaths_chart():
+    deaths_year = cube_slice.by('Start Year', 'Deaths').cumsum().reset_index()
+    deaths_year.columns = ['Start Year', 'Cumulative Deaths']
+    return px.line(deaths_year, x='Start Year', y='Cumulative Deaths', title="Cumulative Deaths")
 
-type_year = filtered_df.groupby(['Start Year', 'Disaster Type']).size().reset_index(name='Count')
-st.plotly_chart(px.bar(type_year, x='Start Year', y='Count', color='Disaster Type',
-                       animation_frame='Start Year', range_y=[0, type_year['Count'].max()],
-                       title="Disaster Types Over Years (Animated)"), use_container_width=True)
 
-subtype_counts = filtered_df['Disaster Subtype'].value_counts().reset_index()
-subtype_counts.columns = ['Disaster Subtype', 'Count']
-st.plotly_chart(px.bar(subtype_counts, x='Disaster Subtype', y='Count', title="Disaster Subtype Counts"), use_container_width=True)
+def type_counts_chart():
+    type_counts = cube_slice.value_counts('Disaster Type').reset_index()
+    type_counts.columns = ['Disaster Type', 'Count']
+    return px.pie(type_counts, names='Disaster Type', values='Count', title="Disaster Type Distribution")
 
-st.plotly_chart(px.treemap(filtered_df, path=['Disaster Subgroup', 'Disaster Type'], title="Disaster Subgroup vs Type (Treemap)"), use_container_width=True)
 
-city_exp = filtered_df.assign(Location=filtered_df['Location'].str.split(', ')).explode('Location')
-top_cities = city_exp['Location'].value_counts().head(10).reset_index()
-top_cities.columns = ['City', 'Count']
-st.plotly_chart(px.bar(top_cities, x='City', y='Count', title="Top 10 Cities with Most Disasters"), use_container_width=True)
+def subtype_counts_chart():
+    subtype_counts = cube_slice.value_counts('Disaster Subtype').reset_index()
+    subtype_counts.columns = ['Disaster Subtype', 'Count']
+    return px.bar(subtype_counts, x='Disaster Subtype', y='Count', title="Disaster Subtype Counts")
 
-deaths_type = filtered_df.groupby('Disaster Type')['Total Deaths'].sum().reset_index()
-st.plotly_chart(px.bar(deaths_type, x='Disaster Type', y='Total Deaths', title="Deaths per Disaster Type"), use_container_width=True)
 
-if "Total Damage ('000 US$)" in filtered_df.columns:
-    st.plotly_chart(px.histogram(filtered_df, x="Total Damage ('000 US$)", nbins=30, title="Damage Distribution"), use_container_width=True)
+def map_chart():
+    chart = bounded_map(selection.frame(['Latitude', 'Longitude', 'Disaster Type', 'Total Deaths', 'Location']), lat='Latitude', lon='Longitude',
+                        color='Disaster Type', size='Total Deaths', hover_name='Location', budget=row_budget,
+                        zoom=4, title="Disaster Locations Map")
+    chart.figure.update_layout(mapbox_style="open-street-map", margin={"r":0,"t":0,"l":0,"b":0})
+    return chart
 
-if 'Magnitude' in filtered_df.columns:
-    st.plotly_chart(px.scatter(filtered_df, x='Magnitude', y='Total Deaths',
-                               size="Total Damage ('000 US$)", color='Disaster Type',
-                               title="Magnitude vs Deaths"), use_container_width=True)
 
-st.plotly_chart(px.box(filtered_df, x='Disaster Type', y='Total Deaths', points='all', title="Deaths by Disaster Type (Boxplot)"), use_container_width=True)
-
-st.plotly_chart(px.scatter(filtered_df, x='Start Year', y='Total Deaths',
-                           size="Total Damage ('000 US$)", color='Disaster Type',
-                           animation_frame='Start Year', title="Animated Deaths Over Time"), use_container_width=True)
+st.header("Exploratory Data Analysis")
+trends_tab, types_tab, cities_tab, damage_tab = st.tabs(
+    ["Trends", "Disaster Types", "Cities & Map", "Damage & Magnitude"], key="eda_tabs", on_change="rerun"
+)
 
-if 'Latitude' in filtered_df.columns and 'Longitude' in filtered_df.columns:
-    map_fig = px.scatter_mapbox(filtered_df, lat='Latitude', lon='Longitude',
-                                color='Disaster Type', size='Total Deaths', hover_name='Location',
-                                zoom=4, title="Disaster Locations Map")
-    map_fig.update_layout(mapbox_style="open-street-map", margin={"r":0,"t":0,"l":0,"b":0})
-    st.plotly_chart(map_fig, use_container_width=True)
+if trends_tab.open:
+    with trends_tab:
+        show_chart("deaths_over_time", lambda: px.line(cube_slice.by('Start Year', 'Deaths').reset_index(name='Total Deaths'),
+                                                       x='Start Year', y='Total Deaths', title="Deaths Over Time"))
+        show_chart("disasters_over_time", lambda: px.area(cube_slice.by('Start Year').reset_index(name='Count'),
+                                                          x='Start Year', y='Count', title="Disasters Over Time"))
+        show_chart("cumulative_deaths", cumulative_deaths_chart)
+        show_chart("types_over_years", lambda: year_frames.counts_figure(selection.mask, title="Disaster Types Over Years (Animated)"))
+        show_chart("deaths_over_time_animated", lambda: year_frames.scatter_figure(
+            selection.mask, 'Total Deaths', "Total Damage ('000 US$)", title="Animated Deaths Over Time"))
+
+if types_tab.open:
+    with types_tab:
+        show_chart("type_distribution", type_counts_chart)
+        show_chart("subtype_counts", subtype_counts_chart)
+        show_chart("subgroup_treemap", lambda: px.treemap(cube_slice.by(['Disaster Subgroup', 'Disaster Type']).reset_index(name='Count'),
+                                                          path=['Disaster Subgroup', 'Disaster Type'], values='Count', title="Disaster Subgroup vs Type (Treemap)"))
+        show_chart("deaths_per_type", lambda: px.bar(cube_slice.by('Disaster Type', 'Deaths').reset_index(name='Total Deaths'),
+                                                     x='Disaster Type', y='Total Deaths', title="Deaths per Disaster Type"))
+        show_chart(("deaths_boxplot", row_budget), lambda: bounded_box(selection.frame(['Disaster Type', 'Total Deaths']), x='Disaster Type', y='Total Deaths',
+                                                                   budget=row_budget, title="Deaths by Disaster Type (Boxplot)"))
+
+if cities_tab.open:
+    with cities_tab:
+        show_chart("top_cities", lambda: px.bar(cube_slice.top_cities(10), x='City', y='Count', title="Top 10 Cities with Most Disasters"))
+        if 'Latitude' in df.columns and 'Longitude' in df.columns:
+            show_chart(("locations_map", row_budget), map_chart)
+
+if damage_tab.open:
+    with damage_tab:
+        if "Total Damage ('000 US$)" in df.columns:
+            show_chart(("damage_histogram", row_budget), lambda: bounded_histogram(selection.frame(["Total Damage ('000 US$)"]), x="Total Damage ('000 US$)",
+                                                                                   nbins=30, budget=row_budget, title="Damage Distribution"))
+        if 'Magnitude' in df.columns:
+            show_chart(("magnitude_vs_deaths", row_budget), lambda: bounded_scatter(
+                selection.frame(['Magnitude', 'Total Deaths', "Total Damage ('000 US$)", 'Disaster Type']), x='Magnitude', y='Total Deaths',
+                size="Total Damage ('000 US$)", color='Disaster Type', budget=row_budget,
+                title="Magnitude vs Deaths"))
 
 # Predictions
 st.header("Predictions")
+predictions_tab, heatmap_tab = st.tabs(
+    ["Deadly & Severity", "Severity Heatmap"], key="prediction_tabs", on_change="rerun"
+)
+
+if predictions_tab.open:
+    with predictions_tab:
+        col_deadly, col_severity = st.columns(2)
+
+        # Deadly prediction pie
+        show_chart("predicted_deadly", lambda: px.pie(cube_slice.deadly_counts(), names='Predicted_Deadly', values='Count',
+                                                      title="Predicted Deadly Events (Yes/No)",
+                                                      color='Predicted_Deadly', color_discrete_map={"Yes": "red", "No": "blue"}),
+                   col_deadly)
+
+        # Severity prediction bar
+        show_chart("predicted_severity", lambda: px.bar(cube_slice.severity_by('Disaster Type'), x='Disaster Type', y='Count',
+                                                        color='Predicted_Severity', barmode='stack',
+                                                        title="Predicted Severity by Disaster Type"),
+                   col_severity)
+
+
+def severity_heatmap_chart():
+    heatmap_pivot = cube_slice.city_severity_mean(cube_slice.top_cities(10)['City'])
+    return px.imshow(
+        heatmap_pivot,
+        labels=dict(x="Disaster Type", y="City", color="Avg Severity Level"),
+        x=heatmap_pivot.columns,
+        y=heatmap_pivot.index,
+        color_continuous_scale='RdYlBu',
+        title="Heatmap of Average Predicted Severity Levels"
+    )
 
-col_deadly, col_severity = st.columns(2)
-
-# Deadly prediction pie
-deadly_counts = filtered_df['Predicted_Deadly'].value_counts().reset_index()
-deadly_counts.columns = ['Predicted_Deadly', 'Count']
-if 'Yes' not in deadly_counts['Predicted_Deadly'].values:
-    deadly_counts.loc[len(deadly_counts)] = ['Yes', 0]
-if 'No' not in deadly_counts['Predicted_Deadly'].values:
-    deadly_counts.loc[len(deadly_counts)] = ['No', 0]
-deadly_counts = deadly_counts.sort_values(by='Predicted_Deadly')
-fig_deadly = px.pie(deadly_counts, names='Predicted_Deadly', values='Count',
-                    title="Predicted Deadly Events (Yes/No)",
-                    color='Predicted_Deadly', color_discrete_map={"Yes": "red", "No": "blue"})
-col_deadly.plotly_chart(fig_deadly, use_container_width=True)
-
-# Severity prediction bar
-severity_type = filtered_df.groupby(['Disaster Type', 'Predicted_Severity']).size().reset_index(name='Count')
-fig_severity = px.bar(severity_type, x='Disaster Type', y='Count', color='Predicted_Severity',
-                       barmode='stack', title="Predicted Severity by Disaster Type")
-col_severity.plotly_chart(fig_severity, use_container_width=True)
 
 # Heatmap
-st.header("Heatmap: Average Severity Levels (Top Cities × Disaster Types)")
-df_exp = filtered_df.assign(Location=filtered_df['Location'].str.split(', ')).explode('Location')
-df_exp = df_exp[df_exp['Location'].isin(top_cities['City'])]
-severity_map = {'Low': 1, 'Medium': 2, 'High': 3}
-df_exp['Severity_Numeric'] = df_exp['Predicted_Severity'].map(severity_map)
-
-heatmap_data = df_exp.groupby(['Location', 'Disaster Type'])['Severity_Numeric'].mean().reset_index()
-heatmap_pivot = heatmap_data.pivot(index='Location', columns='Disaster Type', values='Severity_Numeric')
-fig_heatmap = px.imshow(
-    heatmap_pivot,
-    labels=dict(x="Disaster Type", y="City", color="Avg Severity Level"),
-    x=heatmap_pivot.columns,
-    y=heatmap_pivot.index,
-    color_continuous_scale='RdYlBu',
-    title="Heatmap of Average Predicted Severity Levels"
-)
-st.plotly_chart(fig_heatmap, use_container_width=True)
+if heatmap_tab.open:
+    with heatmap_tab:
+        st.subheader("Average Severity Levels (Top Cities × Disaster Types)")
+        show_chart("severity_heatmap", severity_heatmap_chart)
 
 # Final Data Table
+# Every column can be shown; only the rows of the requested page are read and sent to the browser
 st.header("Filtered Data Table")
-st.dataframe(filtered_df)
-
-csv = filtered_df.to_csv(index=False).encode('utf-8')
-st.download_button("Download filtered data", data=csv,
-                   file_name='filtered_disasters.csv', mime='text/csv')
+with profiler.section("table"):
+    table_columns = st.multiselect("Columns", full.columns, [col for col in TABLE_COLUMNS if col in full.columns])
+    search_col, sort_col, order_col, size_col = st.columns([3, 3, 1, 1])
+    search_text = search_col.text_input("Search", placeholder="Text in any shown column")
+    sort_column = sort_col.selectbox("Sort by", [None] + full.columns, format_func=lambda col: col or "(data order)")
+    descending = order_col.checkbox("Descending")
+    page_size = size_col.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+
+    table = selection.search(search_text, table_columns) if search_text else selection
+    if sort_column:
+        table = table.order_by(filter_engine.sort_order(sort_column, ascending=not descending))
+    page_count = max(1, -(-len(table) // page_size))
+    if st.session_state.get("table_page", 1) > page_count:
+        st.session_state["table_page"] = page_count
+    page_number = st.number_input("Page", min_value=1, max_value=page_count, key="table_page")
+    st.dataframe(table.page(page_number - 1, page_size, table_columns))
+    first_row = (page_number - 1) * page_size
+    st.caption(f"Rows {min(first_row + 1, len(table)):,}-{min(first_row + page_size, len(table)):,} "
+               f"of {len(table):,} (page {page_number} of {page_count})")
+
+# Exports are written only on click, streamed in chunks and cached per filter combination.
+# They keep every column, read from the same data version as the selection
+with profiler.section("export"):
+    export_cache = derived("export_cache", load_stats, ExportCache)
+    export_format = st.radio("Export format", list(EXPORT_FORMATS), horizontal=True)
+    st.download_button("Download filtered data",
+                       data=lambda: export_cache.read(signature, export_format, full, selection.rows),
+                       file_name=export_file_name('filtered_disasters', export_format),
+                       mime=export_mime(export_format), on_click="ignore")
+
+profiler.render()
@@ -0,0 +1,145 @@
+"""Pre-aggregated cube behind the Key Metrics and EDA charts.
+
+The disaster events are grouped once per data version into cells keyed by
+(Start Year, Disaster Type, Disaster Subgroup, Disaster Subtype, Location).
+Each cell holds the event count, death and damage sums, the deadliest event
+and the prediction counts. Every metric and aggregate chart is then a
+slice-and-sum over the cells instead of a scan of the filtered rows.
+
+Events listing several cities keep a single ``Location`` cell; city totals
+are obtained through the ``CityIndex`` incidence matrix, so an event is
+never counted twice.
+"""
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ['Start Year', 'Disaster Type', 'Disaster Subgroup', 'Disaster Subtype']
+DAMAGE_COLUMN = "Total Damage ('000 US$)"
+SEVERITY_LEVELS = {'Low': 1, 'Medium': 2, 'High': 3}
+
+
+class AggregateCube:
+    def __init__(self, df, city_index):
+        self.city_index = city_index
+        frame = pd.DataFrame({dim: df[dim] for dim in DIMENSIONS}).reset_index(drop=True)
+        frame['Location Code'] = city_index.codes
+        frame['Count'] = 1
+        frame['Deaths'] = df['Total Deaths'].to_numpy(dtype=np.float64)
+        frame['Damage'] = df[DAMAGE_COLUMN].to_numpy(dtype=np.float64) if DAMAGE_COLUMN in df.columns else np.nan
+        frame['Deadly Yes'] = (df['Predicted_Deadly'] == 'Yes').to_numpy(dtype=np.int64)
+        frame['Deadly No'] = (df['Predicted_Deadly'] == 'No').to_numpy(dtype=np.int64)
+        for level in sorted(SEVERITY_LEVELS):
+            frame[f'Severity {level}'] = (df['Predicted_Severity'] == level).to_numpy(dtype=np.int64)
+        measures = [col for col in frame.columns if col not in DIMENSIONS and col != 'Location Code']
+
+        grouped = frame.groupby(DIMENSIONS + ['Location Code'], observed=True, dropna=False, sort=True)
+        cells = grouped[measures].sum()
+        cells['Max Deaths'] = grouped['Deaths'].max()
+        # First row holding the cell's maximum, matching Series.idxmax on the rows
+        cells['Deadliest Row'] = grouped['Deaths'].idxmax()
+        self.cells = cells.reset_index()
+
+    def slice(self, year_range=None, disaster_types=None, cities=None):
+        """Return the ``CubeSlice`` of cells matching the sidebar filters.
+
+        Same semantics as ``FilterEngine.select``.
+        """
+        cells = self.cells
+        keep = np.ones(len(cells), dtype=bool)
+        if year_range is not None:
+            keep &= ((cells['Start Year'] >= year_range[0]) & (cells['Start Year'] <= year_range[1])).to_numpy()
+        if disaster_types is not None:
+            keep &= cells['Disaster Type'].isin(disaster_types).to_numpy()
+        if cities:
+            keep &= self.city_index.location_mask(cities)[cells['Location Code'].to_numpy()]
+        return CubeSlice(self, cells[keep])
+
+
+class CubeSlice:
+    def __init__(self, cube, cells):
+        self.cube = cube
+        self.cells = cells
+
+    @property
+    def count(self):
+        return int(self.cells['Count'].sum())
+
+    @property
+    def empty(self):
+        return self.count == 0
+
+    def total(self, measure):
+        return self.cells[measure].sum()
+
+    def mean(self, measure):
+        return self.total(measure) / self.count
+
+    def by(self, dimensions, measure='Count'):
+        """Sum of ``measure`` per value of ``dimensions``, like ``groupby(...).sum()``."""
+        return self.cells.groupby(dimensions, observed=True)[measure].sum()
+
+    def value_counts(self, dimension):
+        """Event count per value in descending order, like ``Series.value_counts``."""
+        counts = self.by(dimension)
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    def mode(self, dimension):
+        return self.value_counts(dimension).index[0]
+
+    def nunique(self, dimension):
+        return len(self.value_counts(dimension))
+
+    def deadliest_row(self):
+        """Position of the first event with the most deaths."""
+        top = self.cells[self.cells['Max Deaths'] == self.cells['Max Deaths'].max()]
+        return int(top['Deadliest Row'].min())
+
+    def location_totals(self, measure='Count'):
+        city_index = self.cube.city_index
+        return np.bincount(self.cells['Location Code'].to_numpy(), weights=self.cells[measure].to_numpy(),
+                           minlength=city_index.n_locations + 1)
+
+    def most_frequent_location(self):
+        """The location with the most selected events, or ``None`` when none of them has one."""
+        counts = self.location_totals()[:-1]
+        if counts.sum() == 0:
+            return None
+        return self.cube.city_index.locations[int(np.argmax(counts))]
+
+    def top_cities(self, n=10):
+        return self.cube.city_index.top_cities(self.location_totals().astype(np.int64), n)
+
+    def deadly_counts(self):
+        """``(Predicted_Deadly, Count)`` frame with both Yes and No."""
+        return pd.DataFrame({
+            'Predicted_Deadly': ['No', 'Yes'],
+            'Count': [int(self.total('Deadly No')), int(self.total('Deadly Yes'))],
+        })
+
+    def severity_by(self, dimension):
+        """``(dimension, Predicted_Severity, Count)`` rows, like ``groupby([...]).size()``."""
+        columns = [f'Severity {level}' for level in sorted(SEVERITY_LEVELS)]
+        counts = self.cells.groupby(dimension, observed=True)[columns].sum()
+        counts.columns = sorted(SEVERITY_LEVELS)
+        stacked = counts.stack()
+        stacked.index.names = [dimension, 'Predicted_Severity']
+        return stacked[stacked > 0].reset_index(name='Count')
+
+    def city_severity_mean(self, cities, dimension='Disaster Type'):
+        """Average predicted severity (Low=1 .. High=3) per (city, ``dimension``)."""
+        city_index = self.cube.city_index
+        group_codes, group_names = pd.factorize(self.cells[dimension], sort=True)
+        keep = group_codes >= 0
+        loc_codes = self.cells['Location Code'].to_numpy()[keep]
+        group_codes = group_codes[keep]
+
+        shape = (city_index.n_locations + 1, len(group_names))
+        rows = np.zeros(shape, dtype=np.int64)
+        sums = np.zeros(shape)
+        counts = np.zeros(shape, dtype=np.int64)
+        np.add.at(rows, (loc_codes, group_codes), self.cells['Count'].to_numpy()[keep])
+        for level, score in SEVERITY_LEVELS.items():
+            level_counts = self.cells[f'Severity {level}'].to_numpy()[keep]
+            np.add.at(sums, (loc_codes, group_codes), score * level_counts)
+            np.add.at(counts, (loc_codes, group_codes), level_counts)
+        return city_index.city_group_mean(sums, counts, rows, group_names, cities, group_label=dimension)
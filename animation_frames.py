@@ -0,0 +1,157 @@
+"""Compact per-year animation frames for the animated dashboard charts.
+
+``YearFrames`` orders the rows by (Start Year, Disaster Type) once per
+dataset version. A filter only slices that order with the selection mask;
+nothing is regrouped. The figures are built from one styled base trace per
+disaster type and one frame per year. Each frame carries only the data
+arrays of the traces that changed since the previous year, instead of a
+full copy of every trace as ``animation_frame`` produces, and names the
+previous year as its ``baseframe``. Every ``KEYFRAME_INTERVAL`` years a frame
+carries every trace. Plotly resolves a frame by merging its chain of base
+frames back to the last keyframe, so a slider jump to any year shows every
+trace's data for that year.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Largest marker diameter in pixels, as px.scatter's default size_max
+SIZE_MAX = 20
+# Years between frames that carry every trace; bounds the baseframe chains
+KEYFRAME_INTERVAL = 10
+
+
+# Play/pause buttons and year slider with the same timings as plotly express animations
+def _animate_args(duration, frame=None):
+    return [frame, {"frame": {"duration": duration, "redraw": False}, "mode": "immediate",
+                    "fromcurrent": True, "transition": {"duration": duration, "easing": "linear"}}]
+
+
+def _controls(years, prefix):
+    return {
+        "updatemenus": [{
+            "buttons": [
+                {"args": _animate_args(500), "label": "&#9654;", "method": "animate"},
+                {"args": _animate_args(0, [None]), "label": "&#9724;", "method": "animate"},
+            ],
+            "direction": "left", "pad": {"r": 10, "t": 70}, "showactive": False, "type": "buttons",
+            "x": 0.1, "xanchor": "right", "y": 0, "yanchor": "top",
+        }],
+        "sliders": [{
+            "active": 0, "currentvalue": {"prefix": f"{prefix}="}, "len": 0.9,
+            "pad": {"b": 10, "t": 60}, "x": 0.1, "xanchor": "left", "y": 0, "yanchor": "top",
+            "steps": [{"args": _animate_args(0, [str(year)]), "label": str(year), "method": "animate"}
+                      for year in years],
+        }],
+    }
+
+
+class YearFrames:
+    def __init__(self, df, year_column='Start Year', group_column='Disaster Type'):
+        self.df = df
+        self.year_column = year_column
+        self.group_column = group_column
+        years = pd.to_numeric(df[year_column], errors='coerce').to_numpy(dtype=np.float64)
+        codes, self.groups = pd.factorize(df[group_column], sort=True)
+        valid = np.flatnonzero(~np.isnan(years) & (codes >= 0))
+        self.rows = valid[np.lexsort((codes[valid], years[valid]))]
+        self.row_years = years[self.rows].astype(np.int64)
+        self.row_groups = codes[self.rows]
+        self._values = {}
+
+    def values(self, column):
+        """``column`` in frame order, as float64."""
+        if column not in self._values:
+            self._values[column] = pd.to_numeric(self.df[column], errors='coerce').to_numpy(dtype=np.float64)[self.rows]
+        return self._values[column]
+
+    def runs(self, mask):
+        """(year, group code, positions) for every (year, group) with selected rows, in frame order."""
+        positions = np.flatnonzero(mask[self.rows])
+        key = self.row_years[positions] * len(self.groups) + self.row_groups[positions]
+        starts = np.flatnonzero(np.r_[True, np.diff(key) != 0])
+        ends = np.r_[starts[1:], len(positions)]
+        for start, end in zip(starts, ends):
+            first = positions[start]
+            yield int(self.row_years[first]), int(self.row_groups[first]), positions[start:end]
+
+    def _figure(self, mask, trace_type, trace_data, trace_style, layout):
+        frames_by_year = {}
+        for year, group, positions in self.runs(mask):
+            frames_by_year.setdefault(year, {})[group] = trace_data(year, positions)
+        years = sorted(frames_by_year)
+        groups = sorted({group for per_year in frames_by_year.values() for group in per_year})
+        empty = {key: [] for key in trace_data(0, np.empty(0, dtype=np.int64))}
+
+        frames, previous = [], {}
+        for number, year in enumerate(years):
+            keyframe = number % KEYFRAME_INTERVAL == 0
+            changed, indices = [], []
+            for index, group in enumerate(groups):
+                data = frames_by_year[year].get(group, empty)
+                if keyframe or group not in previous or any(
+                    not np.array_equal(data[key], previous[group][key]) for key in data
+                ):
+                    changed.append(_unflatten(data))
+                    indices.append(index)
+                previous[group] = data
+            frames.append(go.Frame(name=str(year), data=changed, traces=indices,
+                                   baseframe=None if keyframe else str(years[number - 1])))
+
+        first = frames_by_year[years[0]] if years else {}
+        base = []
+        for group in groups:
+            name = str(self.groups[group])
+            trace = _unflatten(first.get(group, empty))
+            for key, value in trace_style(name).items():
+                trace[key] = {**trace[key], **value} if isinstance(value, dict) and key in trace else value
+            base.append(trace_type(name=name, legendgroup=name, **trace))
+        fig = go.Figure(data=base, frames=frames)
+        fig.update_layout(**layout, **_controls(years, self.year_column))
+        if years:
+            fig.update_xaxes(range=[years[0] - 1, years[-1] + 1])
+        return fig
+
+    def counts_figure(self, mask, title=None):
+        """Animated bar chart of the event count per disaster type and year."""
+        max_count = max((len(positions) for _, _, positions in self.runs(mask)), default=0)
+        return self._figure(
+            mask, go.Bar,
+            lambda year, positions: {"x": [year], "y": [len(positions)]} if len(positions) else {"x": [], "y": []},
+            lambda name: {"hovertemplate": f"{self.group_column}={name}<br>{self.year_column}=%{{x}}<br>Count=%{{y}}<extra></extra>"},
+            {"title": title, "barmode": "relative", "legend": {"title": {"text": self.group_column}},
+             "xaxis": {"title": {"text": self.year_column}}, "yaxis": {"title": {"text": "Count"}, "range": [0, max_count]}},
+        )
+
+    def scatter_figure(self, mask, y, size, title=None):
+        """Animated scatter of every selected event, one frame per year, sized like px.scatter."""
+        y_values, sizes = self.values(y), self.values(size)
+        selected = mask[self.rows]
+        max_size = np.nanmax(sizes[selected], initial=0)
+        max_y = np.nanmax(y_values[selected], initial=0)
+        return self._figure(
+            mask, go.Scatter,
+            lambda year, positions: {"x": np.full(len(positions), year), "y": y_values[positions],
+                                     "marker.size": sizes[positions]},
+            lambda name: {
+                "mode": "markers",
+                "marker": {"sizemode": "area", "sizeref": max_size / SIZE_MAX ** 2 if max_size else 1},
+                "hovertemplate": (f"{self.group_column}={name}<br>{self.year_column}=%{{x}}<br>{y}=%{{y}}"
+                                  f"<br>{size}=%{{marker.size}}<extra></extra>"),
+            },
+            {"title": title, "legend": {"title": {"text": self.group_column}, "itemsizing": "constant"},
+             "xaxis": {"title": {"text": self.year_column}},
+             "yaxis": {"title": {"text": y}, "range": [0, max_y * 1.05 or 1]}},
+        )
+
+
+def _unflatten(data):
+    """{"marker.size": v} -> {"marker": {"size": v}} for trace constructors."""
+    result = {}
+    for key, value in data.items():
+        head, _, tail = key.partition('.')
+        if tail:
+            result.setdefault(head, {})[tail] = value
+        else:
+            result[key] = value
+    return result
@@ -0,0 +1,71 @@
+"""Data and per-version indexes behind the two Streamlit apps.
+
+The apps call these on every rerun, ``warmup.py`` calls them once at
+server start and ``data_refresher.py`` calls them when the files change. All
+results are cached process-wide (see ``data_loader``), so a warmed-up server
+serves the first visitor from memory.
+"""
+import plotly.express as px
+
+from aggregate_cube import AggregateCube
+from animation_frames import YearFrames
+from city_index import CityIndex
+from data_loader import DASHBOARD_COLUMNS, derived, load_dataset, load_housing
+from filter_engine import FilterEngine
+from housing_anomalies import AnomalyIndex
+from housing_cube import HousingCube
+from housing_stats import stats_for
+
+
+def disaster_data(data_dir="."):
+    """``(df, load_stats, full, city_index, filter_engine, cube, year_frames)`` for the disaster dashboard.
+
+    ``df`` holds ``DASHBOARD_COLUMNS``; ``full`` offers every column of the same
+    version, and the filter engine's selections read through it.
+    """
+    df, load_stats, full = load_dataset("disasters", data_dir, DASHBOARD_COLUMNS)
+    city_index = derived("city_index", load_stats, lambda: CityIndex(df['Location']))
+    filter_engine = derived("filter_engine", load_stats, lambda: FilterEngine(full, city_index))
+    cube = derived("aggregate_cube", load_stats, lambda: AggregateCube(df, city_index))
+    year_frames = derived("year_frames", load_stats, lambda: YearFrames(df))
+    return df, load_stats, full, city_index, filter_engine, cube, year_frames
+
+
+def housing_data(data_dir="."):
+    """``(df, load_stats, stats, cube)`` for the housing app."""
+    df, load_stats = load_housing(data_dir)
+    # Moments, quantiles and correlations in one pass, cached per data version and
+    # extended incrementally when rows are appended to the CSV
+    stats = derived("housing_stats", load_stats, lambda: stats_for(df))
+    cube = derived("housing_cube", load_stats, lambda: HousingCube(df, stats.columns))
+    return df, load_stats, stats, cube
+
+
+def housing_anomalies(df, load_stats, stats):
+    return derived("housing_anomalies", load_stats, lambda: AnomalyIndex(df, stats.columns, stats.median))
+
+
+def correlation_figure(load_stats, stats):
+    # Built once per data version as a native Plotly chart, so no matplotlib
+    # figure is created (or leaked) per rerun
+    return derived("housing_corr_figure", load_stats, lambda: px.imshow(
+        stats.corr(), text_auto=".2f", color_continuous_scale="RdBu_r", zmin=-1, zmax=1,
+        aspect="auto", height=700,
+    ))
+
+
+def warm_disasters(data_dir="."):
+    """Build everything the disaster dashboard needs up front; returns its load stats."""
+    return disaster_data(data_dir)[1]
+
+
+def warm_housing(data_dir="."):
+    """Build everything the housing app needs up front; returns its load stats."""
+    df, load_stats, stats, _ = housing_data(data_dir)
+    housing_anomalies(df, load_stats, stats)
+    correlation_figure(load_stats, stats)
+    return load_stats
+
+
+# Dataset name (see data_loader.DATASETS) -> warm-up of the app built on it
+WARMERS = {"disasters": warm_disasters, "housing": warm_housing}
@@ -0,0 +1,346 @@
+"""Benchmarks for the dashboards, the data loaders and the model pipeline.
+
+    python benchmark.py [--scales 1 10 100] [--repeat 3] [--pipeline]
+
+For every scale, the datasets are scaled up with ``synthetic_data.py`` into
+a temporary directory. The following are then timed, each as the median of
+``--repeat`` runs:
+
+* ``load.*``: parsing each dataset from CSV
+* ``build.*``: the per-version indexes, aggregates and figures behind the apps
+* ``filter.*``: FilterEngine selections and AggregateCube slices for a set
+  of sidebar filters
+* ``dashboard.*`` / ``housing.*``: both apps, run headless through
+  Streamlit's AppTest for a scripted sequence of widget changes. Every
+  rerun is timed in a cold session (empty process caches) and in a warm
+  one (caches filled by the cold session). ``dashboard.chart.*`` is each
+  figure's build time, as recorded by the figure cache.
+* ``pipeline.*`` (only with ``--pipeline``): every stage of
+  ``predicting_disasters_in_ksa_w_ml.py``, without the stage cache
+
+Each run is appended to ``benchmarks/history.json`` along with the git
+commit and the package versions. Timings more than 20% (and 5 ms) slower
+than the previous run at the same scale are flagged, and the exit status is
+then 1.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import plotly
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+import data_loader
+from aggregate_cube import AggregateCube
+from animation_frames import YearFrames
+from city_index import CityIndex
+from data_loader import DASHBOARD_COLUMNS, EVENTS_FILE, derived, load_disasters, load_housing, read_dataset
+from figure_cache import FigureCache
+from filter_engine import FilterEngine
+from housing_anomalies import AnomalyIndex
+from housing_cube import HousingCube
+from housing_stats import HousingStats
+from synthetic_data import write_scaled
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HISTORY_FILE = os.path.join("benchmarks", "history.json")
+# Flag timings this much slower than the previous run at the same scale
+REGRESSION_RATIO = 1.2
+# ...and at least this much slower, so sub-millisecond noise is not flagged
+REGRESSION_MIN_SECONDS = 0.005
+APP_TIMEOUT = 600
+
+
+def timed(func, repeat=1):
+    """(median seconds, last result) of ``repeat`` calls to ``func``."""
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds), result
+
+
+def median_timings(runs):
+    """Per-name median of a list of {name: seconds} dicts."""
+    names = dict.fromkeys(name for run in runs for name in run)
+    return {name: statistics.median(run[name] for run in runs if name in run) for name in names}
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    # The apps read their CSVs from the working directory
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def bench_loaders(data_dir, repeat):
+    timings = {}
+    for name in data_loader.DATASETS:
+        timings[f"load.{name}_csv"], _ = timed(lambda: read_dataset(name, data_dir), repeat)
+
+    data_loader.clear_cache()
+    df, _ = load_disasters(data_dir, DASHBOARD_COLUMNS)
+    timings["build.city_index"], city_index = timed(lambda: CityIndex(df['Location']), repeat)
+    timings["build.filter_engine"], _ = timed(lambda: FilterEngine(df, city_index), repeat)
+    timings["build.aggregate_cube"], _ = timed(lambda: AggregateCube(df, city_index), repeat)
+    timings["build.year_frames"], _ = timed(lambda: YearFrames(df), repeat)
+
+    housing, _ = load_housing(data_dir)
+    # A full pass, not stats_for's incremental update of the previous result
+    timings["build.housing_stats"], stats = timed(lambda: HousingStats.from_frame(housing), repeat)
+    timings["build.housing_cube"], _ = timed(lambda: HousingCube(housing, stats.columns), repeat)
+    timings["build.housing_anomalies"], _ = timed(lambda: AnomalyIndex(housing, stats.columns, stats.median), repeat)
+    return timings
+
+
+def sidebar_filters(df, city_index):
+    """Named (year_range, disaster_types, cities) combinations, like the ones the sidebar produces."""
+    years = (int(df['Start Year'].min()), int(df['Start Year'].max()))
+    types = sorted(df['Disaster Type'].dropna().unique())
+    cities = list(city_index.top_cities(city_index.location_counts(), 3)['City'])
+    recent = (years[1] - (years[1] - years[0]) // 4, years[1])
+    return {
+        "all": (years, types, []),
+        "one_type": (years, types[:1], []),
+        "recent_years": (recent, types, []),
+        "three_cities": (years, types, cities),
+        "combined": (recent, types[:2], cities),
+    }
+
+
+def bench_filters(data_dir, repeat):
+    df, _ = load_disasters(data_dir, DASHBOARD_COLUMNS)
+    city_index = CityIndex(df['Location'])
+    engine = FilterEngine(df, city_index)
+    cube = AggregateCube(df, city_index)
+    timings = {}
+    for name, (year_range, types, cities) in sidebar_filters(df, city_index).items():
+        timings[f"filter.select.{name}"], _ = timed(lambda: len(engine.select(year_range, types, cities)), repeat)
+        timings[f"filter.slice.{name}"], _ = timed(
+            lambda: cube.slice(year_range, types, cities).total('Deaths'), repeat)
+    return timings
+
+
+def dashboard_steps():
+    """Scripted widget changes for ``Group2_dashboard.py``: (step name, change to apply before the rerun)."""
+    def narrow_years(at):
+        low, high = at.sidebar.slider[0].value
+        at.sidebar.slider[0].set_value((low + (high - low) // 2, high))
+
+    def one_type(at):
+        at.sidebar.multiselect[0].set_value(at.sidebar.multiselect[0].options[:1])
+
+    def cities(at):
+        at.sidebar.multiselect[1].set_value(at.sidebar.multiselect[1].options[:3])
+
+    def tab(key, label):
+        return lambda at: at.session_state.__setitem__(key, label)
+
+    def next_page(at):
+        at.number_input(key="table_page").set_value(2)
+
+    return [
+        ("initial", None),
+        ("tab_types", tab("eda_tabs", "Disaster Types")),
+        ("tab_cities", tab("eda_tabs", "Cities & Map")),
+        ("tab_damage", tab("eda_tabs", "Damage & Magnitude")),
+        ("tab_heatmap", tab("prediction_tabs", "Severity Heatmap")),
+        ("tab_trends", tab("eda_tabs", "Trends")),
+        ("year_slider", narrow_years),
+        ("type_filter", one_type),
+        ("city_filter", cities),
+        ("table_page", next_page),
+    ]
+
+
+def housing_steps():
+    """Scripted widget changes for ``housing_dashboard_app.py``."""
+    def cities(at):
+        at.sidebar.multiselect[0].set_value(at.sidebar.multiselect[0].options[:2])
+
+    def price_bands(at):
+        at.sidebar.multiselect[2].set_value(at.sidebar.multiselect[2].options[1:3])
+
+    def narrow_years(at):
+        low, high = at.sidebar.slider[0].value
+        at.sidebar.slider[0].set_value((low + (high - low) // 2, high))
+
+    def density(at):
+        if at.radio:
+            at.radio[0].set_value("Density")
+
+    def outlier_column(at):
+        at.selectbox[0].set_value("sqft_lot")
+
+    return [
+        ("initial", None),
+        ("city_filter", cities),
+        ("price_band_filter", price_bands),
+        ("year_slider", narrow_years),
+        ("density_matrix", density),
+        ("outlier_column", outlier_column),
+    ]
+
+
+def run_app(script, steps):
+    """Seconds taken by the rerun after each scripted step, in one new session."""
+    at = AppTest.from_file(os.path.join(HERE, script), default_timeout=APP_TIMEOUT)
+    timings = {}
+    for name, change in steps:
+        if change is not None:
+            change(at)
+        start = time.perf_counter()
+        at.run()
+        timings[name] = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(f"{script} failed at step {name!r}: {at.exception[0].value}")
+    return timings
+
+
+def bench_apps(data_dir, repeat):
+    runs = []
+    with working_directory(data_dir):
+        for _ in range(repeat):
+            data_loader.clear_cache()
+            timings = {}
+            for prefix, script, steps in [("dashboard", "Group2_dashboard.py", dashboard_steps()),
+                                          ("housing", "housing_dashboard_app.py", housing_steps())]:
+                for session in ["cold", "warm"]:
+                    for step, seconds in run_app(script, steps).items():
+                        timings[f"{prefix}.{session}.{step}"] = seconds
+                    if prefix == "dashboard" and session == "cold":
+                        figures = derived("figure_cache", load_disasters(columns=DASHBOARD_COLUMNS)[1], FigureCache)
+                        for chart_id, seconds in figures.build_seconds.items():
+                            name = chart_id[0] if isinstance(chart_id, tuple) else chart_id
+                            timings[f"dashboard.chart.{name}"] = seconds
+            runs.append(timings)
+    return median_timings(runs)
+
+
+def bench_pipeline(data_dir, repeat):
+    # scikit-learn and imbalanced-learn are only needed for this benchmark
+    import predicting_disasters_in_ksa_w_ml as ml_pipeline
+
+    runs = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix="benchmark-pipeline-") as output_dir:
+            pipeline, _ = ml_pipeline.run(os.path.join(data_dir, EVENTS_FILE), use_cache=False,
+                                          output_dir=output_dir)
+        runs.append({f"pipeline.{name}": seconds for name, seconds, _ in pipeline.timings})
+    return median_timings(runs)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scale(source_dir, scale, repeat, pipeline, seed=0):
+    with tempfile.TemporaryDirectory(prefix=f"benchmark-{scale:g}x-") as data_dir:
+        rows = write_scaled(source_dir, data_dir, scale, seed)
+        timings = {}
+        timings.update(bench_loaders(data_dir, repeat))
+        timings.update(bench_filters(data_dir, repeat))
+        timings.update(bench_apps(data_dir, repeat))
+        if pipeline:
+            timings.update(bench_pipeline(data_dir, repeat))
+        data_loader.clear_cache()
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "scale": scale,
+        "rows": rows,
+        "repeat": repeat,
+        "versions": {
+            "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "plotly": plotly.__version__, "streamlit": streamlit.__version__,
+        },
+        "timings": timings,
+    }
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_history(history, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(history, f, indent=1)
+
+
+def previous_run(history, result):
+    """Latest earlier run with the same scale and row counts."""
+    for entry in reversed(history):
+        if entry["scale"] == result["scale"] and entry["rows"] == result["rows"]:
+            return entry
+    return None
+
+
+def report(result, previous):
+    """Print the timings next to the previous run's; returns the names that regressed."""
+    before = previous["timings"] if previous else {}
+    rows = result["rows"][EVENTS_FILE]
+    print(f"\nScale {result['scale']:g}x ({rows:,} events), commit {result['commit'] or 'unknown'}"
+          + (f", compared with {previous['commit'] or 'unknown'} ({previous['timestamp']})" if previous else ""))
+    regressions = []
+    for name, seconds in result["timings"].items():
+        line = f"  {name:<40} {seconds * 1000:10.1f} ms"
+        if name in before and before[name] > 0:
+            ratio = seconds / before[name]
+            line += f"  {before[name] * 1000:10.1f} ms  {ratio:5.2f}x"
+            if ratio > REGRESSION_RATIO and seconds - before[name] > REGRESSION_MIN_SECONDS:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default=".", help="directory holding the real CSV files")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10],
+                        help="row multipliers to benchmark, e.g. 10 100 1000 (default: 1 10)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (default: 3)")
+    parser.add_argument("--pipeline", action="store_true", help="also time the model training pipeline")
+    parser.add_argument("--history", default=HISTORY_FILE, help=f"JSON history file (default: {HISTORY_FILE})")
+    parser.add_argument("--no-save", action="store_true", help="do not append the results to the history")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the synthetic data")
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    regressions = []
+    for scale in args.scales:
+        result = run_scale(os.path.abspath(args.data_dir), scale, args.repeat, args.pipeline, args.seed)
+        regressions += [f"{scale:g}x {name}" for name in report(result, previous_run(history, result))]
+        history.append(result)
+    if not args.no_save:
+        save_history(history, args.history)
+    if regressions:
+        print(f"\n{len(regressions)} timings regressed by more than {REGRESSION_RATIO - 1:.0%}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""Build the Arrow snapshot the dashboards memory-map at startup.
+
+The apps write it themselves on the first load of new CSVs; run this to
+build it ahead of time, e.g. when deploying:
+
+    python build_snapshot.py [--data-dir .]
+"""
+import argparse
+
+from data_loader import build_snapshots
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default=".", help="directory holding the CSV files")
+    parser.add_argument("--snapshot-dir", default=None, help="output directory (default: <data-dir>/snapshot)")
+    args = parser.parse_args()
+
+    for name, entry in build_snapshots(args.data_dir, args.snapshot_dir).items():
+        print(f"{name}: {entry['rows']} rows -> {entry['file']}")
+
+
+if __name__ == "__main__":
+    main()
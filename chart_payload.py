@@ -0,0 +1,182 @@
+"""Row-level charts whose browser payload stays bounded as the data grows.
+
+Each builder draws the usual Plotly Express chart while the filtered rows fit
+in the row budget. Above it, the data is reduced on the server first:
+
+* map: events binned into a lat/lon grid, one marker per occupied cell
+* scatter: stratified sample per colour group
+* box plot: precomputed quartiles and fences, plus a sample of the outliers
+* histogram: bins counted with numpy, sent as bars
+* scatter matrix: a sample stratified by colour quantile, or 2D density
+  bins per panel
+
+Builders return a ``BoundedChart`` that records what was sent, so the page
+can report the payload size next to the chart.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+ROW_BUDGET = 5000
+SAMPLE_SEED = 0
+
+
+@dataclass
+class BoundedChart:
+    figure: go.Figure
+    rows: int
+    sent_rows: int
+    mode: str
+    unit: str = "rows"
+    payload_bytes: int = 0
+
+    def __post_init__(self):
+        if not self.payload_bytes:
+            self.payload_bytes = len(self.figure.to_json())
+
+    def caption(self):
+        if self.unit == "rows":
+            sent = f"{self.sent_rows:,} of {self.rows:,} rows sent"
+        else:
+            sent = f"{self.sent_rows:,} {self.unit} sent for {self.rows:,} rows"
+        return f"{self.mode}: {sent}, {self.payload_bytes / 1e3:,.1f} kB payload"
+
+
+def stratified_sample(frame, by, n, seed=SAMPLE_SEED):
+    """About ``n`` rows of ``frame``, keeping each ``by`` group's share (at least one row each)."""
+    if len(frame) <= n:
+        return frame
+    shares = frame.groupby(by, observed=True, dropna=False)[by].transform('size') / len(frame)
+    keys = np.random.default_rng(seed).random(len(frame))
+    # Rank rows within their group by a random key and keep the first share * n of each
+    rank = pd.Series(keys, index=frame.index).groupby(frame[by], observed=True, dropna=False).rank(method='first')
+    return frame[rank <= np.maximum(1, np.round(shares * n))]
+
+
+def grid_cells(frame, lat, lon, budget, cell_degrees=0.05):
+    """Integer (row, col) grid cell of each event; cells double in size until at most ``budget`` are occupied."""
+    while True:
+        cells = pd.DataFrame({
+            'cell_lat': np.floor(frame[lat].to_numpy() / cell_degrees),
+            'cell_lon': np.floor(frame[lon].to_numpy() / cell_degrees),
+        }, index=frame.index)
+        if len(cells.drop_duplicates()) <= budget:
+            return cells
+        cell_degrees *= 2
+
+
+def bounded_map(frame, lat, lon, color, size, hover_name, budget=ROW_BUDGET, **kwargs):
+    if len(frame) <= budget:
+        fig = px.scatter_mapbox(frame, lat=lat, lon=lon, color=color, size=size, hover_name=hover_name, **kwargs)
+        return BoundedChart(fig, len(frame), len(frame), "All events")
+
+    frame = frame.dropna(subset=[lat, lon])
+    cells = grid_cells(frame, lat, lon, budget)
+    keyed = pd.concat([frame[[lat, lon, color, size]], cells], axis=1)
+    grouped = keyed.groupby(['cell_lat', 'cell_lon'], sort=False)
+    binned = grouped.agg(**{lat: (lat, 'mean'), lon: (lon, 'mean'), size: (size, 'sum')})
+    binned['Events'] = grouped.size()
+    # Colour each cell by its most frequent disaster type
+    binned[color] = (keyed.groupby(['cell_lat', 'cell_lon', color], sort=False, observed=True).size()
+                     .sort_values(ascending=False).reset_index(level=color)
+                     .groupby(level=[0, 1]).head(1)[color])
+    binned = binned.reset_index(drop=True)
+    fig = px.scatter_mapbox(binned, lat=lat, lon=lon, color=color, size='Events',
+                            hover_data={size: True, 'Events': True}, **kwargs)
+    return BoundedChart(fig, len(frame), len(binned), "Grid-binned", unit="cells")
+
+
+def bounded_scatter(frame, x, y, size, color, budget=ROW_BUDGET, **kwargs):
+    sample = stratified_sample(frame, color, budget)
+    fig = px.scatter(sample, x=x, y=y, size=size, color=color, **kwargs)
+    mode = "All events" if len(sample) == len(frame) else "Stratified sample"
+    return BoundedChart(fig, len(frame), len(sample), mode)
+
+
+def box_summary(frame, x, y):
+    """Quartiles and Tukey fences of ``y`` per ``x`` group."""
+    grouped = frame.dropna(subset=[y]).groupby(x, observed=True)[y]
+    summary = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    summary.columns = ['q1', 'median', 'q3']
+    iqr = summary['q3'] - summary['q1']
+    lower, upper = summary['q1'] - 1.5 * iqr, summary['q3'] + 1.5 * iqr
+    values = frame[[x, y]].dropna(subset=[y])
+    inside = values[y].between(values[x].map(lower).astype(float), values[x].map(upper).astype(float))
+    # Fences end at the most extreme points still inside them
+    summary['lowerfence'] = values[inside].groupby(x, observed=True)[y].min()
+    summary['upperfence'] = values[inside].groupby(x, observed=True)[y].max()
+    summary['mean'] = grouped.mean()
+    return summary, values[~inside]
+
+
+def bounded_box(frame, x, y, budget=ROW_BUDGET, title=None):
+    if len(frame) <= budget:
+        fig = px.box(frame, x=x, y=y, points='all', title=title)
+        return BoundedChart(fig, len(frame), len(frame), "All events")
+
+    summary, outliers = box_summary(frame, x, y)
+    outliers = stratified_sample(outliers, x, budget)
+    fig = go.Figure(go.Box(
+        x=summary.index.astype(str), q1=summary['q1'], median=summary['median'], q3=summary['q3'],
+        lowerfence=summary['lowerfence'], upperfence=summary['upperfence'], mean=summary['mean'],
+        name=y, boxpoints=False,
+    ))
+    fig.add_trace(go.Scatter(x=outliers[x].astype(str), y=outliers[y], mode='markers',
+                             name='Outliers', marker={'size': 4}))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+    return BoundedChart(fig, len(frame), len(summary) + len(outliers), "Quantile summary")
+
+
+def bounded_histogram(frame, x, nbins, budget=ROW_BUDGET, title=None):
+    if len(frame) <= budget:
+        fig = px.histogram(frame, x=x, nbins=nbins, title=title)
+        return BoundedChart(fig, len(frame), len(frame), "All events")
+
+    values = frame[x].dropna().to_numpy(dtype=np.float64)
+    counts, edges = np.histogram(values, bins=nbins)
+    fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), name=x))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title='count', bargap=0)
+    return BoundedChart(fig, len(frame), len(counts), "Binned", unit="bins")
+
+
+def bounded_scatter_matrix(frame, dimensions, color, budget=ROW_BUDGET, **kwargs):
+    """Scatter matrix of at most ``budget`` rows, sampled evenly across the deciles of ``color``."""
+    if len(frame) <= budget:
+        fig = px.scatter_matrix(frame, dimensions=dimensions, color=color, **kwargs)
+        return BoundedChart(fig, len(frame), len(frame), "All rows")
+
+    strata = pd.qcut(frame[color], 10, labels=False, duplicates='drop')
+    sample = stratified_sample(frame.assign(_stratum=strata), '_stratum', budget)
+    fig = px.scatter_matrix(sample, dimensions=dimensions, color=color, **kwargs)
+    return BoundedChart(fig, len(frame), len(sample), "Stratified sample")
+
+
+def density_matrix(frame, dimensions, bins=20, title=None):
+    """Matrix of 2D density bins (histograms on the diagonal); its size does not depend on the row count."""
+    # Only the housing app's Density mode needs subplots
+    from plotly.subplots import make_subplots
+
+    k = len(dimensions)
+    values = {name: frame[name].to_numpy(dtype=np.float64) for name in dimensions}
+    fig = make_subplots(rows=k, cols=k, shared_xaxes='columns', horizontal_spacing=0.02, vertical_spacing=0.02)
+    for i, y in enumerate(dimensions):
+        for j, x in enumerate(dimensions):
+            if i == j:
+                counts, edges = np.histogram(values[x][~np.isnan(values[x])], bins=bins)
+                trace = go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), showlegend=False)
+            else:
+                both = ~np.isnan(values[x]) & ~np.isnan(values[y])
+                counts, x_edges, y_edges = np.histogram2d(values[x][both], values[y][both], bins=bins)
+                trace = go.Heatmap(x=(x_edges[:-1] + x_edges[1:]) / 2, y=(y_edges[:-1] + y_edges[1:]) / 2,
+                                   z=np.where(counts.T > 0, counts.T, np.nan), coloraxis='coloraxis')
+            fig.add_trace(trace, row=i + 1, col=j + 1)
+            if j == 0:
+                fig.update_yaxes(title_text=y, row=i + 1, col=1)
+            if i == k - 1:
+                fig.update_xaxes(title_text=x, row=k, col=j + 1)
+    fig.update_layout(title=title, bargap=0, height=150 * k + 100,
+                      coloraxis={'colorscale': 'Viridis', 'colorbar': {'title': {'text': 'rows'}}})
+    return BoundedChart(fig, len(frame), k * (k - 1) * bins * bins + k * bins, "Density bins", unit="bins")
@@ -0,0 +1,81 @@
+"""Event x city index for the comma-separated ``Location`` column.
+
+``Location`` has far fewer distinct values than rows, so the index stores one
+location code per row plus a small location x city incidence matrix. Every
+city query is answered with ``np.bincount`` over the codes and a product with
+that matrix, without splitting strings at request time.
+"""
+import numpy as np
+import pandas as pd
+
+CITY_SEPARATOR = ", "
+
+
+class CityIndex:
+    def __init__(self, locations):
+        codes, uniques = pd.factorize(locations, sort=True)
+        self.locations = list(uniques)
+        self.cities = sorted({city for loc in self.locations for city in str(loc).split(CITY_SEPARATOR)})
+        position = {city: i for i, city in enumerate(self.cities)}
+
+        # Code n_locations stands for a missing Location and matches no city
+        self.n_locations = len(self.locations)
+        self.codes = np.where(codes < 0, self.n_locations, codes)
+        self.incidence = np.zeros((self.n_locations + 1, len(self.cities)), dtype=np.int64)
+        for i, loc in enumerate(self.locations):
+            for city in set(str(loc).split(CITY_SEPARATOR)):
+                self.incidence[i, position[city]] = 1
+        self._position = position
+
+    def __len__(self):
+        return len(self.codes)
+
+    def city_positions(self, cities):
+        return [self._position[city] for city in cities if city in self._position]
+
+    def location_mask(self, cities):
+        """Boolean mask over location codes that contain any of ``cities``."""
+        return self.incidence[:, self.city_positions(cities)].any(axis=1)
+
+    def rows_mask(self, cities):
+        """Boolean row mask of events located in any of ``cities``."""
+        return self.location_mask(cities)[self.codes]
+
+    def postings(self, city):
+        """Row ids of the events located in ``city``."""
+        return np.flatnonzero(self.rows_mask([city]))
+
+    def location_counts(self, mask=None):
+        codes = self.codes if mask is None else self.codes[mask]
+        return np.bincount(codes, minlength=self.n_locations + 1)
+
+    def city_counts(self, location_counts):
+        """Per-city totals of per-location counts, as a Series indexed by city."""
+        return pd.Series(np.asarray(location_counts) @ self.incidence, index=self.cities)
+
+    def top_cities(self, location_counts, n=10):
+        """``(City, Count)`` frame of the ``n`` cities with most events; ties by name."""
+        counts = self.city_counts(location_counts)
+        counts = counts[counts > 0].sort_index()
+        top = counts.sort_values(ascending=False, kind='stable').head(n)
+        return pd.DataFrame({'City': top.index, 'Count': top.to_numpy()})
+
+    def city_group_mean(self, sums, counts, rows, group_names, cities, group_label=None):
+        """Mean per (city, group) from location x group totals.
+
+        ``sums`` and ``counts`` hold the sum and number of non-missing values,
+        ``rows`` the number of events, each as a (location code, group) matrix.
+        Mirrors exploding ``Location`` and running
+        ``groupby(['Location', group]).mean().pivot(...)``: rows are the given
+        cities sorted by name and columns the groups with at least one event.
+        """
+        positions = self.city_positions(sorted(cities))
+        selected = self.incidence[:, positions].T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = (selected @ sums) / (selected @ counts)
+        present = (selected @ rows).sum(axis=0) > 0
+        return pd.DataFrame(
+            means[:, present],
+            index=pd.Index([self.cities[i] for i in positions], name='Location'),
+            columns=pd.Index(np.asarray(group_names)[present], name=group_label),
+        )
@@ -0,0 +1,130 @@
+"""Chunked, cached export of filtered rows for the download buttons.
+
+Exports are only written when a download is requested. Rows are taken from
+the shared frame a chunk at a time and streamed into a temporary file, so the
+full CSV text and its encoded bytes never sit in memory side by side. Written
+files are kept in a small LRU keyed by (filter signature, format), so the same
+download is served again without being rebuilt.
+"""
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+
+CHUNK_ROWS = 50_000
+EXPORT_CACHE_SIZE = 8
+
+# label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def export_file_name(stem, fmt):
+    return f"{stem}.{EXPORT_FORMATS[fmt][0]}"
+
+
+def export_mime(fmt):
+    return EXPORT_FORMATS[fmt][1]
+
+
+def _chunks(df, rows, chunk_rows=CHUNK_ROWS):
+    for start in range(0, len(rows), chunk_rows):
+        yield df.take(rows[start:start + chunk_rows])
+
+
+def write_csv(df, rows, out, chunk_rows=CHUNK_ROWS):
+    """Write ``df.take(rows)`` as CSV text to the binary stream ``out``, one chunk at a time."""
+    for i, chunk in enumerate(_chunks(df, rows, chunk_rows)):
+        out.write(chunk.to_csv(index=False, header=i == 0).encode('utf-8'))
+    if len(rows) == 0:
+        out.write(df.take(rows[:0]).to_csv(index=False).encode('utf-8'))
+
+
+def write_parquet(df, rows, path, chunk_rows=CHUNK_ROWS):
+    """Write ``df.take(rows)`` to ``path`` as Parquet, one row group per chunk."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df.take(rows[:0]), preserve_index=False)
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in _chunks(df, rows, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def write_export(df, rows, fmt, path):
+    if fmt == "Parquet":
+        write_parquet(df, rows, path)
+    elif fmt == "CSV (gzip)":
+        with gzip.open(path, 'wb', compresslevel=6) as out:
+            write_csv(df, rows, out)
+    else:
+        with open(path, 'wb') as out:
+            write_csv(df, rows, out)
+
+
+class ExportCache:
+    """LRU of export files on disk, keyed by (filter signature, format)."""
+
+    def __init__(self, maxsize=EXPORT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.directory = tempfile.mkdtemp(prefix="dashboard-export-")
+        self._files = OrderedDict()
+        self._lock = threading.Lock()
+        # key -> Event set once the export being written for it is done
+        self._writing = {}
+        # Remove the files once the cache is replaced (e.g. by a new dataset version)
+        weakref.finalize(self, shutil.rmtree, self.directory, True)
+
+    def path(self, signature, fmt, df, rows):
+        """Path of the export for ``signature``, writing it first if needed."""
+        key = (signature, fmt)
+        while True:
+            with self._lock:
+                path = self._files.get(key)
+                if path is not None and os.path.exists(path):
+                    self._files.move_to_end(key)
+                    return path
+                writing = self._writing.get(key)
+                if writing is None:
+                    # Claimed by this call, so concurrent clicks do not export twice
+                    writing = self._writing[key] = threading.Event()
+                    break
+            # Another session is writing this export; use its file (or retry if it failed)
+            writing.wait()
+
+        try:
+            fd, path = tempfile.mkstemp(suffix="." + EXPORT_FORMATS[fmt][0], dir=self.directory)
+            os.close(fd)
+            # Written without the lock, so other downloads are served meanwhile
+            try:
+                write_export(df, rows, fmt, path)
+            except BaseException:
+                os.remove(path)
+                raise
+            with self._lock:
+                self._files[key] = path
+                self._files.move_to_end(key)
+                while len(self._files) > self.maxsize:
+                    _, evicted = self._files.popitem(last=False)
+                    if os.path.exists(evicted):
+                        os.remove(evicted)
+        finally:
+            with self._lock:
+                del self._writing[key]
+            writing.set()
+        return path
+
+    def read(self, signature, fmt, df, rows):
+        # Streamlit keeps the served bytes in memory regardless; this is the only full copy
+        while True:
+            try:
+                with open(self.path(signature, fmt, df, rows), 'rb') as f:
+                    return f.read()
+            except FileNotFoundError:
+                continue  # evicted by a concurrent export between path() and open(): write it again
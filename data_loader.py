@@ -0,0 +1,450 @@
+"""Cached, typed loading of the datasets used by the dashboards.
+
+The CSVs are parsed, joined and cleaned once per file version and kept in a
+process-wide cache, so every Streamlit session and rerun shares the same
+frame. A file version is identified by the mtime and size of every input, so
+replacing any of the CSVs invalidates the cache on the next call.
+
+The typed frames are memory-mapped from the Arrow snapshot instead of being
+parsed from CSV. When the snapshot is missing or stale, the first process to
+load the new version parses the CSVs and writes it (``build_snapshot.py``
+does the same ahead of time), so every worker process shares one mapped copy
+of the data. Without pyarrow or a writable directory, the parsed frame is
+used directly. A frame limited to some columns comes with a ``LazyFrame``
+of the same version, which reads the other columns from the mapped snapshot
+only when they are used.
+
+When ``data_refresher.py`` runs, sessions stop checking the files: they keep
+the loaded version while the refresher builds the next one in a private
+stage (``staging``) and publishes it in one step.
+"""
+import contextlib
+import hashlib
+import itertools
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+import prediction_store
+import snapshot
+
+EVENTS_FILE = "merged_output.csv"
+SEVERITY_FILE = "disaster_predictions_with_severity.csv"
+DEADLY_FILE = "disaster_predictions_logreg.csv"
+HOUSING_FILE = "cleaned_housing_data.csv"
+# disaster_model.artifact_path() relative to the data directory; checked without
+# importing disaster_model, which loads joblib and scipy
+MODEL_ARTIFACT = os.path.join("models", "disaster_models.joblib")
+
+# Low-cardinality text columns of the disaster data, stored as categoricals
+CATEGORICAL_COLUMNS = [
+    'Historic', 'Classification Key', 'Disaster Group', 'Disaster Subgroup',
+    'Disaster Type', 'Disaster Subtype', 'ISO', 'Country', 'Subregion', 'Region',
+    'Location', 'OFDA/BHA Response', 'Appeal', 'Declaration', 'Magnitude Scale',
+    'Admin Units', 'Admin Cities', 'Last Update',
+    'Predicted_Severity', 'Predicted_Deadly',
+]
+
+HOUSING_CATEGORICAL_COLUMNS = ['waterfront', 'city', 'statezip', 'country']
+
+# Columns of the disaster data that Group2_dashboard.py shows or computes with;
+# the rest are only read for exports
+DASHBOARD_COLUMNS = [
+    'DisNo.', 'Start Year', 'Start Month', 'Disaster Subgroup', 'Disaster Type', 'Disaster Subtype',
+    'Location', 'Latitude', 'Longitude', 'Magnitude', 'Magnitude Scale', 'Total Deaths',
+    'Total Affected', "Total Damage ('000 US$)", 'Predicted_Deadly', 'Predicted_Severity',
+]
+
+
+@dataclass
+class LoadStats:
+    version: str
+    rows: int
+    source: str
+    load_seconds: float
+    memory_bytes: int
+    # The same columns as parsed from CSV, before apply_dtypes
+    untyped_memory_bytes: int
+    # Typed memory of the columns left out by a column projection
+    projection_saved_bytes: int = 0
+    hits: int = 0
+    # Increases with every load, so newer values are never replaced by older ones
+    generation: int = 0
+
+    @property
+    def seconds_saved(self):
+        return self.hits * self.load_seconds
+
+    @property
+    def memory_saved_bytes(self):
+        return self.untyped_memory_bytes - self.memory_bytes
+
+
+class LazyFrame:
+    """Every column of one loaded version, for the data table and exports.
+
+    Columns of the loaded ``frame`` are used as they are. Any other column is
+    converted from ``source`` (the mapped snapshot table, or the parsed frame
+    without a snapshot) the first time it is needed, and ``take`` converts
+    only the requested rows.
+    """
+
+    def __init__(self, frame, source=None):
+        self.frame = frame
+        self._source = source
+        if source is None:
+            self.columns = list(frame.columns)
+        elif isinstance(source, pd.DataFrame):
+            self.columns = list(source.columns)
+        else:
+            self.columns = list(source.column_names)
+        self._columns = {}
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __getitem__(self, name):
+        if name in self.frame.columns:
+            return self.frame[name]
+        if name not in self._columns:
+            if isinstance(self._source, pd.DataFrame):
+                self._columns[name] = self._source[name]
+            else:
+                self._columns[name] = snapshot.table_frame(self._source, [name])[name]
+        return self._columns[name]
+
+    def take(self, rows, columns=None):
+        """DataFrame of the rows at positions ``rows`` (as its index), with ``columns`` (all by default)."""
+        columns = self.columns if columns is None else list(columns)
+        if self._source is None or isinstance(self._source, pd.DataFrame):
+            source = self.frame if self._source is None else self._source
+            return source.take(rows)[columns]
+        df = snapshot.table_frame(self._source.select(columns).take(rows))
+        df.index = pd.Index(rows)
+        return df
+
+
+_lock = threading.Lock()
+_cache = {}
+_derived = {}
+_generations = itertools.count(1)
+# Set while data_refresher.py owns reloading
+_background_refresh = False
+# Per thread: the stage the refresher is building the next version in
+_staging = threading.local()
+
+
+def _disaster_model():
+    try:
+        import disaster_model
+    except ImportError:  # scikit-learn/joblib missing: use the prediction CSVs
+        return None
+    return disaster_model
+
+
+def model_artifact(data_dir="."):
+    """Path of the exported model artifact, or None when it cannot be used."""
+    path = os.path.join(data_dir, MODEL_ARTIFACT)
+    if not os.path.exists(path) or _disaster_model() is None:
+        return None
+    return path
+
+
+def data_paths(data_dir="."):
+    """Inputs of the disaster dataset: events plus the prediction store, the model artifact or the prediction CSVs."""
+    events_path = os.path.join(data_dir, EVENTS_FILE)
+    store = prediction_store.store_path(data_dir)
+    if os.path.exists(store):
+        return [events_path, store]
+    artifact = model_artifact(data_dir)
+    if artifact is not None:
+        return [events_path, artifact]
+    return [events_path, os.path.join(data_dir, SEVERITY_FILE), os.path.join(data_dir, DEADLY_FILE)]
+
+
+def housing_paths(data_dir="."):
+    return [os.path.join(data_dir, HOUSING_FILE)]
+
+
+def file_signature(paths):
+    """Return a hashable (path, mtime, size) tuple for each input file."""
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def dataset_version(signature):
+    return hashlib.sha1(repr(signature).encode("utf-8")).hexdigest()[:12]
+
+
+def _prediction_column(path, keyword):
+    # Prefer the model output (e.g. Predicted_Severity_Level) over the training label
+    header = pd.read_csv(path, nrows=0).columns
+    matches = [col for col in header if keyword in col.strip().lower()]
+    predicted = [col for col in matches if col.strip().lower().startswith('predicted')]
+    return (predicted or matches)[0]
+
+
+def _join_predictions(events, path, column):
+    # Keyed on DisNo. when the file has it; older files are row-aligned with the events.
+    # Either way, events appended since the pipeline ran get no prediction (NaN)
+    if prediction_store.ID_COLUMN in pd.read_csv(path, nrows=0).columns:
+        predictions = pd.read_csv(path, usecols=[prediction_store.ID_COLUMN, column])
+        predictions = predictions.drop_duplicates(prediction_store.ID_COLUMN, keep='last')
+        return events[prediction_store.ID_COLUMN].map(predictions.set_index(prediction_store.ID_COLUMN)[column])
+    predictions = pd.read_csv(path, usecols=[column])[column]
+    if len(predictions) > len(events):
+        raise ValueError(f"{path} has {len(predictions)} rows but there are only {len(events)} events")
+    return predictions.reindex(pd.RangeIndex(len(events)))
+
+
+def _read_disasters(data_dir):
+    paths = data_paths(data_dir)
+    df = pd.read_csv(paths[0])
+
+    if len(paths) == 2:
+        # Predictions joined on DisNo.: from the store kept by refresh_predictions.py,
+        # else scored here with the persisted models
+        if paths[1] == prediction_store.store_path(data_dir):
+            predictions = prediction_store.read_store(paths[1])
+        else:
+            disaster_model = _disaster_model()
+            predictions = disaster_model.predict(df, disaster_model.load_artifact(paths[1]))
+        df['Predicted_Severity'] = df['DisNo.'].map(predictions['Predicted_Severity_Level']).values
+        df['Predicted_Deadly'] = df['DisNo.'].map(predictions['Predicted_Is_Deadly'].map({1: 'Yes', 0: 'No'})).values
+    else:
+        _, severity_path, deadly_path = paths
+        severity_col = _prediction_column(severity_path, 'severity')
+        deadly_col = _prediction_column(deadly_path, 'deadly')
+        df['Predicted_Severity'] = _join_predictions(df, severity_path, severity_col).values
+        df['Predicted_Deadly'] = _join_predictions(df, deadly_path, deadly_col).map({1: 'Yes', 0: 'No'}).values
+
+    # Clean numeric columns
+    df['Start Year'] = pd.to_numeric(df['Start Year'], errors='coerce')
+    df['Total Deaths'] = pd.to_numeric(df['Total Deaths'], errors='coerce').fillna(0)
+    return df
+
+
+def _read_housing(data_dir):
+    return pd.read_csv(housing_paths(data_dir)[0])
+
+
+def apply_dtypes(df, categorical_columns):
+    """Convert text columns to categoricals and downcast integer columns in place."""
+    for col in categorical_columns:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    # Floats stay float64 so sums and statistics match the untyped frame exactly
+    for col in df.select_dtypes(include='integer').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+
+DATASETS = {
+    "disasters": (data_paths, _read_disasters, CATEGORICAL_COLUMNS),
+    "housing": (housing_paths, _read_housing, HOUSING_CATEGORICAL_COLUMNS),
+}
+
+
+def read_dataset(name, data_dir="."):
+    """Parse dataset ``name`` from CSV; return the typed frame and ``{column: [untyped bytes, typed bytes]}``."""
+    _, reader, categorical_columns = DATASETS[name]
+    df = reader(data_dir)
+    untyped = df.memory_usage(deep=True, index=False)
+    df = apply_dtypes(df, categorical_columns)
+    typed = df.memory_usage(deep=True, index=False)
+    return df, {col: [int(untyped[col]), int(typed[col])] for col in df.columns}
+
+
+def build_snapshots(data_dir=".", snapshot_dir=None):
+    """Write a fresh Arrow snapshot of every dataset and return the manifest entries."""
+    snapshot_dir = snapshot_dir or os.path.join(data_dir, snapshot.SNAPSHOT_DIR)
+    entries = {}
+    for name, (paths, _, _) in DATASETS.items():
+        df, column_bytes = read_dataset(name, data_dir)
+        entries[name] = snapshot.write_snapshot(
+            name, df, paths(data_dir), snapshot_dir,
+            column_bytes=column_bytes,
+        )
+    return entries
+
+
+def _frames(source, columns):
+    # (frame, LazyFrame) for ``columns`` of a mapped snapshot table or a parsed frame
+    if isinstance(source, pd.DataFrame):
+        frame = source if columns is None else source[[col for col in columns if col in source.columns]]
+    else:
+        frame = snapshot.table_frame(source, columns)
+    return frame, LazyFrame(frame, None if columns is None else source)
+
+
+def _build_snapshot(name, sources, data_dir, columns):
+    """Parse dataset ``name``, write its snapshot and map it back; returns ``(df, full, source, column_bytes)``."""
+    fingerprints = [snapshot.fingerprint(path) for path in sources] if snapshot.pa is not None else None
+    df, column_bytes = read_dataset(name, data_dir)
+    if snapshot.pa is not None:
+        snapshot_dir = os.path.join(data_dir, snapshot.SNAPSHOT_DIR)
+        try:
+            snapshot.write_snapshot(name, df, sources, snapshot_dir, fingerprints=fingerprints,
+                                    column_bytes=column_bytes)
+        except OSError:
+            pass  # read-only deployment: keep the parsed frame
+        else:
+            mapped = snapshot.map_snapshot(name, sources, snapshot_dir)
+            if mapped is not None:
+                return (*_frames(mapped[0], columns), "csv (snapshot written)", column_bytes)
+    return (*_frames(df, columns), "csv", column_bytes)
+
+
+def _read(name, sources, signature, data_dir, columns):
+    start = time.perf_counter()
+    mapped = snapshot.map_snapshot(name, sources, os.path.join(data_dir, snapshot.SNAPSHOT_DIR))
+    if mapped is not None:
+        table, entry = mapped
+        df, full = _frames(table, columns)
+        source, column_bytes = "snapshot", entry["column_bytes"]
+    else:
+        df, full, source, column_bytes = _build_snapshot(name, sources, data_dir, columns)
+    memory = df.memory_usage(deep=True)
+    stats = LoadStats(
+        # A column subset is its own version, so values derived from it are kept apart
+        version=dataset_version(signature if columns is None else (signature, columns)),
+        rows=len(df),
+        source=source,
+        load_seconds=time.perf_counter() - start,
+        memory_bytes=int(memory.sum()),
+        # Compared column for column, so the saving is the typing alone
+        untyped_memory_bytes=int(memory["Index"]) + sum(column_bytes[col][0] for col in df.columns),
+        projection_saved_bytes=sum(typed for col, (_, typed) in column_bytes.items() if col not in df.columns),
+        generation=next(_generations),
+    )
+    return signature, df, stats, full
+
+
+def _load(name, data_dir, columns=None):
+    paths, _, _ = DATASETS[name]
+    sources = paths(data_dir)
+    signature = file_signature(sources)
+    columns = None if columns is None else tuple(columns)
+    key = (name, os.path.abspath(data_dir), columns)
+    stage = getattr(_staging, "stage", None)
+    with _lock:
+        cached = _cache.get(key)
+        if stage is not None:
+            cached = stage.cache.get(key, cached)
+        # With a background refresher, sessions keep the loaded version until it publishes the next one
+        if cached is not None and (cached[0] == signature or (_background_refresh and stage is None)):
+            cached[2].hits += 1
+            return cached[1:]
+        if stage is None:
+            _cache[key] = _read(name, sources, signature, data_dir, columns)
+            return _cache[key][1:]
+    # The refresher reads without the lock, so sessions are not blocked meanwhile
+    stage.cache[key] = _read(name, sources, signature, data_dir, columns)
+    return stage.cache[key][1:]
+
+
+def load_disasters(data_dir=".", columns=None):
+    """Return ``(df, stats)`` for the current version of the disaster CSVs.
+
+    ``columns`` limits the frame to those columns (all of them by default).
+    The returned frame is shared between sessions and must not be modified
+    in place.
+    """
+    return _load("disasters", data_dir, columns)[:2]
+
+
+def load_housing(data_dir="."):
+    """Return ``(df, stats)`` for the current version of the housing CSV."""
+    return _load("housing", data_dir)[:2]
+
+
+def load_dataset(name, data_dir=".", columns=None):
+    """Return ``(df, stats, full)`` for dataset ``name`` (a key of ``DATASETS``).
+
+    ``full`` is the ``LazyFrame`` with every column of the same version as ``df``.
+    """
+    return _load(name, data_dir, columns)
+
+
+def derived(kind, stats, build):
+    """Memoize ``build()`` for the dataset version described by ``stats``.
+
+    Used for indexes and aggregates computed from a loaded frame; only the
+    latest version of each ``kind`` is kept.
+    """
+    stage = getattr(_staging, "stage", None)
+    with _lock:
+        cached = _derived.get(kind)
+        if stage is not None:
+            cached = stage.derived.get(kind, cached)
+        if cached is not None and cached[0] == stats.version:
+            return cached[2]
+    value = build()
+    with _lock:
+        target = _derived if stage is None else stage.derived
+        cached = target.get(kind)
+        # A rerun that started before a refresh must not replace the newer value
+        if cached is None or stats.generation >= cached[1]:
+            target[kind] = (stats.version, stats.generation, value)
+    return value
+
+
+class Stage:
+    def __init__(self):
+        self.cache = {}
+        self.derived = {}
+
+
+@contextlib.contextmanager
+def staging():
+    """Build the next version of the data in this thread without exposing it.
+
+    Inside the block, loads and ``derived`` values go to a private ``Stage``
+    (unchanged ones are read through from the current caches). When the
+    block exits without an error, the stage replaces the current entries in
+    a single step, so a session sees either every old value or every new one.
+    """
+    stage = Stage()
+    _staging.stage = stage
+    try:
+        yield stage
+    finally:
+        _staging.stage = None
+    with _lock:
+        _cache.update(stage.cache)
+        _derived.update(stage.derived)
+
+
+def set_background_refresh(enabled):
+    """Whether loads skip checking the files and return the cached version (see ``data_refresher.py``)."""
+    global _background_refresh
+    _background_refresh = enabled
+
+
+def stale_entries():
+    """``{(name, data_dir, columns): (stats, new signature)}`` of the loaded frames whose files changed."""
+    with _lock:
+        items = list(_cache.items())
+    stale = {}
+    for key, (signature, _, stats, _) in items:
+        name, data_dir, _ = key
+        try:
+            current = file_signature(DATASETS[name][0](data_dir))
+        except OSError:
+            continue  # a file is being replaced; check again later
+        if current != signature:
+            stale[key] = (stats, current)
+    return stale
+
+
+def clear_cache():
+    """Forget every loaded frame and derived value, as in a newly started process."""
+    with _lock:
+        _cache.clear()
+        _derived.clear()
@@ -0,0 +1,131 @@
+"""Background refresh of the datasets while the apps keep serving.
+
+A daemon thread polls the data files every ``DASHBOARD_REFRESH_INTERVAL``
+seconds (default 5; 0 turns it off, and every rerun then checks the files
+itself as before). Once a dataset's files have changed and then stayed the
+same for one more poll, so that a copy still in progress is not read, the
+thread rebuilds the snapshot, the frame and the apps' indexes and aggregates
+in a private stage (``data_loader.staging``), then swaps them all in at once.
+Until then every session keeps serving the previous version, and no session
+pays for the rebuild.
+
+Each refresh is logged to the ``dashboard.refresh`` logger and kept in
+``DataRefresher.history`` with the old and new version ids and its duration.
+"""
+import collections
+import datetime
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import app_data
+import data_loader
+
+REFRESH_INTERVAL_ENV = "DASHBOARD_REFRESH_INTERVAL"
+REFRESH_INTERVAL = 5.0
+HISTORY_SIZE = 50
+
+log = logging.getLogger("dashboard.refresh")
+
+_lock = threading.Lock()
+_refresher = None
+
+
+@dataclass
+class Refresh:
+    dataset: str
+    data_dir: str
+    old_version: str
+    new_version: str  # None when the rebuild failed
+    seconds: float
+    finished: datetime.datetime
+    error: str = None
+
+
+class DataRefresher(threading.Thread):
+    def __init__(self, interval=REFRESH_INTERVAL):
+        super().__init__(name="data-refresher", daemon=True)
+        self.interval = interval
+        self.history = collections.deque(maxlen=HISTORY_SIZE)
+        self.last_check = None
+        # Cache key -> signature seen at the previous poll / that failed to load
+        self._pending = {}
+        self._failed = {}
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception:
+                log.exception("background refresh failed")
+
+    def stop(self):
+        self._stopped.set()
+
+    def refresh(self):
+        """Rebuild the datasets whose files changed and have since settled; returns the new ``Refresh`` records."""
+        stale = data_loader.stale_entries()
+        ready = {
+            key: (stats, signature) for key, (stats, signature) in stale.items()
+            if self._pending.get(key) == signature and self._failed.get(key) != signature
+        }
+        self._pending = {key: signature for key, (_, signature) in stale.items()}
+        self.last_check = datetime.datetime.now(datetime.timezone.utc)
+
+        records = []
+        for name, data_dir in sorted({key[:2] for key in ready}):
+            keys = [key for key in ready if key[:2] == (name, data_dir)]
+            start = time.perf_counter()
+            try:
+                with data_loader.staging():
+                    new_versions = {key: data_loader.load_dataset(*key)[1].version for key in keys}
+                    app_data.WARMERS[name](data_dir)
+                error = None
+            except Exception as exc:  # e.g. a malformed CSV: keep serving the old version
+                log.exception("refreshing %s in %s failed", name, data_dir)
+                self._failed.update((key, ready[key][1]) for key in keys)
+                new_versions, error = dict.fromkeys(keys), repr(exc)
+            seconds = time.perf_counter() - start
+            finished = datetime.datetime.now(datetime.timezone.utc)
+            for key in keys:
+                record = Refresh(name, data_dir, ready[key][0].version, new_versions[key], seconds, finished, error)
+                records.append(record)
+                if error is None:
+                    log.info("%s: version %s -> %s in %.3fs", name, record.old_version, record.new_version, seconds)
+        self.history.extend(records)
+        return records
+
+    def refresh_to(self, version):
+        """The latest successful refresh that produced ``version``, if any."""
+        for record in reversed(self.history):
+            if record.new_version == version:
+                return record
+        return None
+
+
+def status_caption(load_stats):
+    """One line on how the version in ``load_stats`` arrived, for the apps' sidebars."""
+    if _refresher is None:
+        return f"Data version {load_stats.version} (checked on every rerun)"
+    record = _refresher.refresh_to(load_stats.version)
+    if record is None:
+        return f"Data version {load_stats.version}; watching the files every {_refresher.interval:g}s"
+    return (f"Data version {load_stats.version}: refreshed in the background from "
+            f"{record.old_version} in {record.seconds:.2f}s at {record.finished:%H:%M:%S} UTC")
+
+
+def start(interval=None):
+    """Start the process-wide refresher once; returns it, or ``None`` when refreshing is turned off."""
+    global _refresher
+    if interval is None:
+        interval = float(os.environ.get(REFRESH_INTERVAL_ENV, REFRESH_INTERVAL))
+    with _lock:
+        if _refresher is None and interval > 0:
+            _refresher = DataRefresher(interval)
+            _refresher.start()
+            # Sessions now keep their loaded version until the refresher replaces it
+            data_loader.set_background_refresh(True)
+        return _refresher
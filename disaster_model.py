@@ -0,0 +1,151 @@
+"""Persisted KSA disaster models and batch inference.
+
+``predicting_disasters_in_ksa_w_ml.py`` exports the fitted models, scalers,
+label encoder and fitted ``FeatureEncoder`` as a single versioned artifact.
+``predict`` scores any frame shaped like ``merged_output.csv`` in one
+vectorized pass and returns predictions keyed by ``DisNo.``, so the
+dashboard no longer depends on row-aligned prediction CSVs.
+"""
+import os
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+ARTIFACT_DIR = "models"
+ARTIFACT_FILE = "disaster_models.joblib"
+ARTIFACT_FORMAT = 2
+
+FEATURES = [
+    'Disaster Type', 'Region', 'Country',
+    'Start Year', 'Start Month',
+    'Magnitude', 'Magnitude Scale'
+]
+CATEGORICAL_FEATURES = ['Disaster Type', 'Region', 'Country', 'Magnitude Scale']
+ID_COLUMN = 'DisNo.'
+
+
+class FeatureEncoder:
+    """One-hot encoder with a vocabulary fixed at ``fit`` time.
+
+    Produces the same column layout as
+    ``pd.get_dummies(df[features], columns=categorical, drop_first=True)`` on
+    the training data (numeric features first, then one column per non-first
+    category), but as a float32 matrix that can be reused for every target
+    and for scoring. Unknown categories encode as all zeros, like the
+    dropped first category.
+    """
+
+    def __init__(self, features=FEATURES, categorical=CATEGORICAL_FEATURES, drop_first=True):
+        self.features = list(features)
+        self.categorical = [col for col in categorical if col in self.features]
+        self.drop_first = drop_first
+
+    def fit(self, df):
+        self.numeric_ = [col for col in self.features if col not in self.categorical]
+        self.integer_ = [i for i, col in enumerate(self.numeric_) if pd.api.types.is_integer_dtype(df[col])]
+        self.categories_ = {col: sorted(df[col].dropna().unique()) for col in self.categorical}
+        self.columns_ = list(self.numeric_)
+        for col, categories in self.categories_.items():
+            kept = categories[1:] if self.drop_first else categories
+            self.columns_ += [f"{col}_{category}" for category in kept]
+        return self
+
+    def transform(self, df, sparse_output=False):
+        """Encode ``df`` into an ``(n_rows, len(columns_))`` float32 matrix (CSR if ``sparse_output``)."""
+        n_rows = len(df)
+        n_numeric = len(self.numeric_)
+        numeric = df[self.numeric_].to_numpy(dtype=np.float32)
+
+        rows, cols = [], []
+        offset = n_numeric
+        for col, categories in self.categories_.items():
+            codes = pd.Categorical(df[col], categories=categories).codes
+            if self.drop_first:
+                codes = codes - 1
+            hit = np.flatnonzero(codes >= 0)
+            rows.append(hit)
+            cols.append(offset + codes[hit])
+            offset += len(categories) - int(self.drop_first)
+        rows, cols = np.concatenate(rows or [[]]).astype(np.int64), np.concatenate(cols or [[]]).astype(np.int64)
+
+        if sparse_output:
+            dummies = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols - n_numeric)),
+                                        shape=(n_rows, offset - n_numeric))
+            return sparse.hstack([sparse.csr_matrix(numeric), dummies], format="csr", dtype=np.float32)
+        X = np.zeros((n_rows, offset), dtype=np.float32)
+        X[:, :n_numeric] = numeric
+        X[rows, cols] = 1.0
+        return X
+
+    def fit_transform(self, df, sparse_output=False):
+        return self.fit(df).transform(df, sparse_output)
+
+    def restore_dtypes(self, X):
+        """Undo interpolation of resampled rows (e.g. after SMOTE) in place.
+
+        Integer features are truncated and indicator columns become 0/1 (any
+        non-zero value counts as set), which is what the int and bool columns
+        of the old ``get_dummies`` frame did to SMOTE's synthetic samples.
+        """
+        X[:, self.integer_] = np.trunc(X[:, self.integer_])
+        X[:, len(self.numeric_):] = X[:, len(self.numeric_):] != 0
+        return X
+
+
+def artifact_path(data_dir="."):
+    return os.path.join(data_dir, ARTIFACT_DIR, ARTIFACT_FILE)
+
+
+def save_artifact(path, deadly_model, deadly_scaler, deadly_encoder,
+                  severity_model, severity_scaler, severity_encoder, label_encoder):
+    """Write the fitted Is_Deadly and Severity_Level models to ``path``."""
+    artifact = {
+        "format": ARTIFACT_FORMAT,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "deadly": {"model": deadly_model, "scaler": deadly_scaler, "encoder": deadly_encoder},
+        "severity": {
+            "model": severity_model,
+            "scaler": severity_scaler,
+            "encoder": severity_encoder,
+            "label_encoder": label_encoder,
+        },
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    joblib.dump(artifact, tmp_path, compress=3)
+    os.replace(tmp_path, path)
+    return artifact
+
+
+def load_artifact(path=None):
+    artifact = joblib.load(path or artifact_path())
+    if artifact.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"Unsupported model artifact format: {artifact.get('format')!r}")
+    return artifact
+
+
+def predict(df, artifact=None):
+    """Score every row of ``df`` with both models.
+
+    Returns a frame indexed by ``DisNo.`` with ``Predicted_Is_Deadly`` (0/1)
+    and ``Predicted_Severity_Level`` (Low/Medium/High).
+    """
+    artifact = artifact or load_artifact()
+    deadly, severity = artifact["deadly"], artifact["severity"]
+
+    encoded = deadly["encoder"].transform(df)
+    # Both models normally share one fitted encoder, so the rows are encoded once
+    if severity["encoder"] is deadly["encoder"]:
+        severity_encoded = encoded
+    else:
+        severity_encoded = severity["encoder"].transform(df)
+    deadly_X = deadly["scaler"].transform(encoded)
+    severity_X = severity["scaler"].transform(severity_encoded)
+
+    return pd.DataFrame({
+        'Predicted_Is_Deadly': deadly["model"].predict(deadly_X),
+        'Predicted_Severity_Level': severity["label_encoder"].inverse_transform(severity["model"].predict(severity_X)),
+    }, index=pd.Index(df[ID_COLUMN].to_numpy(), name=ID_COLUMN))
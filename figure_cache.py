@@ -0,0 +1,53 @@
+"""LRU cache of built Plotly figures, keyed by (chart id, filter signature).
+
+Figures are shared by every session of the process, so returning to a
+filter combination that anyone has already viewed skips both the data work
+and the figure construction. The dashboard keeps one cache per dataset
+version (see ``data_loader.derived``), so new data never serves stale charts.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+FIGURE_CACHE_SIZE = 512
+
+
+def filter_signature(year_range, disaster_types, cities):
+    """Hashable, order-insensitive key for one combination of the sidebar filters."""
+    return (tuple(year_range), tuple(sorted(disaster_types)), tuple(sorted(cities)))
+
+
+class FigureCache:
+    def __init__(self, maxsize=FIGURE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        # chart id -> seconds its latest build took
+        self.build_seconds = {}
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._figures)
+
+    def get(self, chart_id, signature, build):
+        """Return the cached figure, or ``build()`` it and evict the least recently used."""
+        key = (chart_id, signature)
+        with self._lock:
+            figure = self._figures.get(key)
+            if figure is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return figure
+            self.misses += 1
+        # Built outside the lock; two sessions may race to build the same figure,
+        # which only costs the duplicate work
+        start = time.perf_counter()
+        figure = build()
+        with self._lock:
+            self.build_seconds[chart_id] = time.perf_counter() - start
+            self._figures[key] = figure
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.maxsize:
+                self._figures.popitem(last=False)
+        return figure
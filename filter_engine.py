@@ -0,0 +1,149 @@
+"""Bitmap filter engine for the disaster dashboard sidebar.
+
+At load time every Start Year, Disaster Type and city value gets a packed
+bitmap (one bit per row). A sidebar selection is answered by OR-ing the
+bitmaps of the selected values within a filter and AND-ing across filters,
+which yields the row positions of the matching events. Years are stored as
+cumulative "year <= y" bitmaps so any year range costs two bitmaps.
+
+Charts and metrics read the matching rows through a lazy ``Selection``
+that only gathers the columns they actually use; the data table searches,
+orders and pages through it without materializing the filtered frame.
+``df`` may also be a ``data_loader.LazyFrame``, which offers every column of
+the dataset and converts only the rows of the requested page.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _pack(mask):
+    return np.packbits(np.asarray(mask, dtype=bool))
+
+
+class Selection:
+    """Rows of ``df`` matched by a filter, gathered column by column on demand."""
+
+    def __init__(self, df, rows):
+        self.df = df
+        self.rows = rows
+        self._columns = {}
+        self._mask = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def empty(self):
+        return len(self.rows) == 0
+
+    @property
+    def mask(self):
+        """Boolean mask over all rows of ``df``."""
+        if self._mask is None:
+            self._mask = np.zeros(len(self.df), dtype=bool)
+            self._mask[self.rows] = True
+        return self._mask
+
+    def column(self, name):
+        if name not in self._columns:
+            self._columns[name] = self.df[name].take(self.rows)
+        return self._columns[name]
+
+    def frame(self, columns=None):
+        """DataFrame of the selected rows, restricted to ``columns`` when given."""
+        columns = list(self.df.columns) if columns is None else list(columns)
+        return pd.DataFrame({name: self.column(name) for name in columns})
+
+    def search(self, text, columns):
+        """Rows where any of ``columns`` contains ``text`` (case-insensitive)."""
+        found = np.zeros(len(self.rows), dtype=bool)
+        for name in columns:
+            values = self.df[name]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # Match the categories once, then compare codes
+                matching = np.flatnonzero(values.cat.categories.astype(str).str.contains(text, case=False, regex=False))
+                found = found | np.isin(values.cat.codes.to_numpy()[self.rows], matching)
+            else:
+                found = found | self.column(name).astype(str).str.contains(text, case=False, regex=False).to_numpy()
+        return Selection(self.df, self.rows[found])
+
+    def order_by(self, order):
+        """The same rows, reordered by a precomputed order of all rows (see ``FilterEngine.sort_order``)."""
+        return Selection(self.df, order[self.mask[order]])
+
+    def page(self, number, size, columns=None):
+        """DataFrame of the ``number``-th (0-based) page of ``size`` rows."""
+        columns = list(self.df.columns) if columns is None else list(columns)
+        rows = self.rows[number * size:(number + 1) * size]
+        if not isinstance(self.df, pd.DataFrame):
+            return self.df.take(rows, columns)
+        return pd.DataFrame({name: self.df[name].take(rows) for name in columns})
+
+
+class FilterEngine:
+    def __init__(self, df, city_index):
+        self.df = df
+        self.n_rows = len(df)
+        self._all = _pack(np.ones(self.n_rows, dtype=bool))
+        self._none = np.zeros_like(self._all)
+
+        years = pd.to_numeric(df['Start Year'], errors='coerce').to_numpy(dtype=np.float64)
+        self.years = np.unique(years[~np.isnan(years)])
+        year_codes = np.searchsorted(self.years, years)
+        year_codes[np.isnan(years)] = len(self.years)
+        self._years_upto = []
+        cumulative = self._none
+        for code in range(len(self.years)):
+            cumulative = cumulative | _pack(year_codes == code)
+            self._years_upto.append(cumulative)
+
+        type_codes, type_names = pd.factorize(df['Disaster Type'])
+        self._types = {name: _pack(type_codes == code) for code, name in enumerate(type_names)}
+
+        self._cities = {city: _pack(city_index.rows_mask([city])) for city in city_index.cities}
+        self._sort_orders = {}
+
+    def _year_bits(self, year_range):
+        low, high = year_range
+        high_idx = np.searchsorted(self.years, high, side='right') - 1
+        if high_idx < 0:
+            return self._none
+        bits = self._years_upto[high_idx]
+        low_idx = np.searchsorted(self.years, low, side='left') - 1
+        if low_idx >= 0:
+            bits = bits & ~self._years_upto[low_idx]
+        return bits
+
+    def _any_of(self, bitmaps, values):
+        bits = self._none
+        for value in values:
+            if value in bitmaps:
+                bits = bits | bitmaps[value]
+        return bits
+
+    def select(self, year_range=None, disaster_types=None, cities=None):
+        """Return the ``Selection`` matching all given filters.
+
+        ``year_range`` is inclusive; ``disaster_types`` restricts to the given
+        types (an empty list matches nothing); ``cities`` keeps events in any
+        of the cities and is ignored when empty.
+        """
+        bits = self._all
+        if year_range is not None:
+            bits = bits & self._year_bits(year_range)
+        if disaster_types is not None:
+            bits = bits & self._any_of(self._types, disaster_types)
+        if cities:
+            bits = bits & self._any_of(self._cities, cities)
+        rows = np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
+        return Selection(self.df, rows)
+
+    def sort_order(self, column, ascending=True):
+        """Positions of all rows sorted by ``column`` (missing values last), computed once per column."""
+        key = (column, ascending)
+        if key not in self._sort_orders:
+            values = self.df[column].reset_index(drop=True)
+            self._sort_orders[key] = values.sort_values(
+                ascending=ascending, na_position='last', kind='stable'
+            ).index.to_numpy()
+        return self._sort_orders[key]
@@ -0,0 +1,118 @@
+"""Group aggregates behind the housing dashboard's filter sidebar.
+
+The houses are grouped once per data version into cells keyed by
+(city, statezip, yr_built, price band). Each cell holds, for every numeric
+column, the value count, sum, sum of squares, min and max. Filtered
+statistics combine the matching cells instead of rescanning the rows:
+``mean = sum / n`` and ``var = (sumsq - sum**2 / n) / (n - 1)``.
+
+Rows are also stored grouped by cell, so the rows of any filter are read
+through contiguous per-cell ranges (a categorical postings index).
+"""
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ['city', 'statezip', 'yr_built', 'price band']
+PRICE_BAND_EDGES = [0, 250_000, 500_000, 750_000, 1_000_000, np.inf]
+PRICE_BANDS = ['Under $250k', '$250k-500k', '$500k-750k', '$750k-1M', '$1M and over']
+
+
+def price_bands(price):
+    return pd.cut(price, PRICE_BAND_EDGES, labels=PRICE_BANDS, right=False)
+
+
+class HousingCube:
+    def __init__(self, df, columns):
+        self.df = df
+        self.columns = list(columns)
+        keys = pd.DataFrame({
+            'city': df['city'], 'statezip': df['statezip'], 'yr_built': df['yr_built'],
+            'price band': price_bands(df['price']),
+        }).reset_index(drop=True)
+        cell_ids = keys.groupby(DIMENSIONS, observed=True, dropna=False, sort=True).ngroup().to_numpy()
+        self.cells = keys.groupby(DIMENSIONS, observed=True, dropna=False, sort=True).size().rename('rows').reset_index()
+
+        X = df[self.columns].to_numpy(dtype=np.float64)
+        present = ~np.isnan(X)
+        values = np.where(present, X, 0.0)
+        n_cells = len(self.cells)
+        self.count = np.zeros((n_cells, len(self.columns)))
+        self.sum = np.zeros_like(self.count)
+        self.sumsq = np.zeros_like(self.count)
+        np.add.at(self.count, cell_ids, present)
+        np.add.at(self.sum, cell_ids, values)
+        np.add.at(self.sumsq, cell_ids, values ** 2)
+        self.minimum = np.full_like(self.count, np.inf)
+        self.maximum = np.full_like(self.count, -np.inf)
+        np.minimum.at(self.minimum, cell_ids, np.where(present, X, np.inf))
+        np.maximum.at(self.maximum, cell_ids, np.where(present, X, -np.inf))
+
+        # Row positions grouped by cell: cell c owns order[starts[c]:starts[c + 1]]
+        self.order = np.argsort(cell_ids, kind='stable')
+        self.starts = np.r_[0, np.cumsum(self.cells['rows'].to_numpy())]
+
+        self.cities = sorted(self.cells['city'].dropna().unique())
+        self.years = (int(self.cells['yr_built'].min()), int(self.cells['yr_built'].max()))
+
+    def statezips(self, cities=None):
+        """Zip codes present in ``cities`` (all of them when no city is selected)."""
+        cells = self.cells if not cities else self.cells[self.cells['city'].isin(cities)]
+        return sorted(cells['statezip'].dropna().unique())
+
+    def select(self, cities=None, statezips=None, year_range=None, bands=None):
+        """``HousingSelection`` of the cells matching every given filter (empty lists are ignored)."""
+        cells = self.cells
+        keep = np.ones(len(cells), dtype=bool)
+        if cities:
+            keep &= cells['city'].isin(cities).to_numpy()
+        if statezips:
+            keep &= cells['statezip'].isin(statezips).to_numpy()
+        if year_range is not None:
+            keep &= ((cells['yr_built'] >= year_range[0]) & (cells['yr_built'] <= year_range[1])).to_numpy()
+        if bands:
+            keep &= cells['price band'].isin(bands).to_numpy()
+        return HousingSelection(self, np.flatnonzero(keep))
+
+
+class HousingSelection:
+    def __init__(self, cube, cell_positions):
+        self.cube = cube
+        self.cell_positions = cell_positions
+
+    def __len__(self):
+        return int(self.cube.cells['rows'].to_numpy()[self.cell_positions].sum())
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    def summary(self):
+        """count / mean / std / var / min / max of every numeric column, combined from the cells."""
+        cube, cells = self.cube, self.cell_positions
+        n = cube.count[cells].sum(axis=0)
+        total = cube.sum[cells].sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / n
+            var = np.where(n > 1, (cube.sumsq[cells].sum(axis=0) - total * mean) / (n - 1), np.nan)
+        var = np.maximum(var, 0)  # rounding can leave a tiny negative variance
+        minimum = cube.minimum[cells].min(axis=0, initial=np.inf)
+        maximum = cube.maximum[cells].max(axis=0, initial=-np.inf)
+        return pd.DataFrame({
+            'count': n, 'mean': mean, 'std': np.sqrt(var), 'var': var,
+            'min': np.where(n > 0, minimum, np.nan), 'max': np.where(n > 0, maximum, np.nan),
+        }, index=cube.columns).T
+
+    def rows(self):
+        """Positions of the matching rows, read from the per-cell ranges."""
+        cube, cells = self.cube, self.cell_positions
+        if len(cells) == 0:
+            return np.empty(0, dtype=np.int64)
+        starts = cube.starts[cells]
+        lengths = cube.starts[cells + 1] - starts
+        # Expand each (start, length) range without a Python loop over the cells
+        offsets = np.repeat(starts - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+        return np.sort(cube.order[offsets + np.arange(lengths.sum())])
+
+    def frame(self, limit=None):
+        rows = self.rows()
+        return self.cube.df.take(rows if limit is None else rows[:limit])
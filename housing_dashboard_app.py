@@ -1,51 +1,113 @@
 
 import streamlit as st
-import pandas as pd
-import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
-import plotly.express as px
+
+from app_data import correlation_figure, housing_anomalies, housing_data
+from chart_payload import bounded_scatter_matrix, density_matrix
+from data_loader import derived
+from data_refresher import start as start_refresher, status_caption
+from housing_cube import PRICE_BANDS
+from profiling import Profiler
+
+# Above this many rows the scatter matrix is sampled or binned
+SCATTER_MATRIX_ROWS = 2000
 
 st.set_page_config(page_title="Statistical Housing Dashboard", layout="wide")
 
 st.title(" Statistical Analysis of Housing Data")
+# Opt-in section timings (DASHBOARD_PROFILE=1 or ?profile=1)
+profiler = Profiler("housing")
+# Reloads changed data files off the request path
+start_refresher()
 
-# Load data
-df = pd.read_csv("cleaned_housing_data.csv")
+# Load data (memory-mapped from the snapshot when it is fresh, CSV otherwise)
+with profiler.section("load"):
+    # Statistics and group aggregates are built once per data version
+    df, load_stats, stats, cube = housing_data()
+
+# Sidebar filters
+st.sidebar.header("Filters")
+st.sidebar.caption(status_caption(load_stats))
+cities = st.sidebar.multiselect("City", cube.cities)
+statezips = st.sidebar.multiselect("State/ZIP", cube.statezips(cities))
+year_range = st.sidebar.slider("Year Built", cube.years[0], cube.years[1], cube.years)
+bands = st.sidebar.multiselect("Price Band", PRICE_BANDS)
 
 st.markdown("###  Dataset Overview")
 st.dataframe(df.head())
 
+# Filtered statistics come from combining the precomputed group summaries
+st.markdown("###  Filtered Statistics")
+with profiler.section("filtered_statistics"):
+    selection = cube.select(cities, statezips, year_range, bands)
+    if selection.empty:
+        st.warning("No houses match the selected filters.")
+    else:
+        st.caption(f"{len(selection):,} of {len(df):,} houses match the filters")
+        st.dataframe(selection.summary())
+        st.dataframe(selection.frame(limit=100))
+
 # Show key statistics
 st.markdown("###  Summary Statistics")
-st.dataframe(df.describe())
+with profiler.section("summary_statistics"):
+    st.dataframe(stats.describe())
 
 # Additional statistics
 st.markdown("###  Additional Statistics")
-st.write("**Median**")
-st.dataframe(df.median(numeric_only=True))
-st.write("**Mode**")
-st.dataframe(df.mode(numeric_only=True).iloc[0])
-st.write("**Range**")
-st.dataframe(df.max(numeric_only=True) - df.min(numeric_only=True))
-st.write("**Variance**")
-st.dataframe(df.var(numeric_only=True))
-st.write("**Standard Deviation**")
-st.dataframe(df.std(numeric_only=True))
-
-# Correlation matrix
+with profiler.section("additional_statistics"):
+    st.write("**Median**")
+    st.dataframe(stats.median)
+    st.write("**Mode**")
+    st.dataframe(stats.mode)
+    st.write("**Range**")
+    st.dataframe(stats.range)
+    st.write("**Variance**")
+    st.dataframe(stats.var)
+    st.write("**Standard Deviation**")
+    st.dataframe(stats.std)
+
+# Correlation matrix (a Plotly heatmap built once per data version)
 st.markdown("###  Correlation Matrix")
-fig_corr, ax = plt.subplots(figsize=(10, 8))
-sns.heatmap(df.corr(numeric_only=True), annot=True, cmap="coolwarm", ax=ax)
-st.pyplot(fig_corr)
+with profiler.section("correlation_matrix"):
+    fig_corr = correlation_figure(load_stats, stats)
+    st.plotly_chart(fig_corr, use_container_width=True)
 
-# Pairplot of top correlated features
+# Pairplot of top correlated features (ranked from the cached correlation matrix)
 st.markdown("###  Scatter Relationships (Top Correlated Features with Price)")
-top_features = df[['price', 'sqft_living', 'bathrooms', 'sqft_above', 'view']]
-fig_pair = px.scatter_matrix(top_features, dimensions=top_features.columns, color="price")
-st.plotly_chart(fig_pair, use_container_width=True)
-
-# Z-score distribution
-st.markdown("###  Z-Score Distribution (Normalized)")
-z_scores = (df.select_dtypes(include='number') - df.select_dtypes(include='number').mean()) / df.select_dtypes(include='number').std()
-st.line_chart(z_scores.head(50))
+with profiler.section("scatter_matrix"):
+    top_features = stats.top_correlated('price', 4)
+    pair_mode = "Sample"
+    if len(df) > SCATTER_MATRIX_ROWS:
+        pair_mode = st.radio("Scatter matrix mode", ["Sample", "Density"], horizontal=True,
+                             help=f"The data has more than {SCATTER_MATRIX_ROWS:,} rows")
+    if pair_mode == "Density":
+        pair_chart = derived("housing_density_matrix", load_stats, lambda: density_matrix(df, top_features))
+    else:
+        pair_chart = derived("housing_scatter_matrix", load_stats, lambda: bounded_scatter_matrix(
+            df, top_features, color="price", budget=SCATTER_MATRIX_ROWS))
+    st.plotly_chart(pair_chart.figure, use_container_width=True)
+    st.caption(pair_chart.caption())
+
+# Outliers by robust z-score, scored once per data version; a rerun only
+# reads the page being shown
+st.markdown("###  Outliers (Robust Z-Scores)")
+with profiler.section("outliers"):
+    anomalies = housing_anomalies(df, load_stats, stats)
+    st.write("**Distribution Summary**")
+    st.dataframe(anomalies.summary())
+    outlier_column = st.selectbox("Column", anomalies.columns, index=anomalies.columns.index('price'))
+    outlier_count = anomalies.count(outlier_column)
+    if outlier_count == 0:
+        st.info(f"No value of {outlier_column} has |z| above {anomalies.threshold}.")
+    else:
+        page_size = st.selectbox("Rows per page", [25, 50, 100], key="outlier_page_size")
+        page_count = -(-outlier_count // page_size)
+        # Keep the page number valid when the column or page size changes
+        if st.session_state.get("outlier_page", 1) > page_count:
+            st.session_state["outlier_page"] = page_count
+        page_number = st.number_input("Page", min_value=1, max_value=page_count, step=1, key="outlier_page")
+        st.caption(f"{outlier_count:,} values of {outlier_column} have |z| above {anomalies.threshold} "
+                   f"(page {page_number} of {page_count})")
+        st.dataframe(anomalies.page(outlier_column, page_number - 1, page_size,
+                                    columns=[outlier_column, 'price', 'city', 'statezip', 'street']))
+
+profiler.render()
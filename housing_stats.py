@@ -0,0 +1,216 @@
+"""Single-pass statistics for the numeric columns of the housing data.
+
+``HousingStats`` reads the numeric columns once into a float64 matrix and
+keeps only mergeable summaries:
+
+* per column: count, mean, sum of squared deviations, min, max and the
+  sorted values (for quantiles and the mode)
+* over complete rows: the mean vector and the co-moment matrix, from which
+  covariance and Pearson correlation follow
+
+Summaries of two blocks of rows merge exactly (Chan et al.'s pairwise
+update, and a linear merge of sorted runs), so appending rows to
+``cleaned_housing_data.csv`` only costs a pass over the new rows.
+``stats_for`` keeps the latest result and extends it when the new frame
+starts with the rows it has already seen.
+"""
+import hashlib
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+_lock = threading.Lock()
+_latest = None
+
+
+def numeric_matrix(df, columns=None):
+    """(columns, float64 matrix) of the numeric columns of ``df``."""
+    columns = list(df.select_dtypes(include='number').columns) if columns is None else columns
+    return columns, df[columns].to_numpy(dtype=np.float64)
+
+
+def _hasher(X):
+    return hashlib.blake2b(memoryview(np.ascontiguousarray(X)), digest_size=16)
+
+
+def matrix_digest(X):
+    return _hasher(X).hexdigest()
+
+
+def _merge_sorted(a, b):
+    # Timsort merges two sorted runs in linear time
+    return np.sort(np.concatenate([a, b]), kind='stable')
+
+
+@dataclass
+class HousingStats:
+    columns: list
+    rows: int
+    digest: str
+    count: np.ndarray
+    mean: np.ndarray
+    m2: np.ndarray
+    minimum: np.ndarray
+    maximum: np.ndarray
+    sorted_values: list
+    complete_rows: int
+    complete_mean: np.ndarray
+    comoment: np.ndarray
+
+    @classmethod
+    def from_matrix(cls, columns, X, digest=None):
+        present = ~np.isnan(X)
+        count = present.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.nansum(X, axis=0) / count
+        m2 = np.nansum((X - mean) ** 2, axis=0)
+        complete = X[present.all(axis=1)]
+        complete_mean = complete.mean(axis=0) if len(complete) else np.zeros(len(columns))
+        centered = complete - complete_mean
+        return cls(
+            columns=list(columns),
+            rows=len(X),
+            digest=digest or matrix_digest(X),
+            count=count,
+            mean=mean,
+            m2=m2,
+            minimum=np.nanmin(X, axis=0, initial=np.inf),
+            maximum=np.nanmax(X, axis=0, initial=-np.inf),
+            sorted_values=[np.sort(X[present[:, j], j]) for j in range(X.shape[1])],
+            complete_rows=len(complete),
+            complete_mean=complete_mean,
+            comoment=centered.T @ centered,
+        )
+
+    @classmethod
+    def from_frame(cls, df, columns=None):
+        return cls.from_matrix(*numeric_matrix(df, columns))
+
+    def merge(self, other, digest=None):
+        """Statistics of this block's rows followed by ``other``'s."""
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(n > 0, other.count / n, 0)
+            mean = np.where(self.count > 0, self.mean + delta * weight, other.mean)
+            m2 = self.m2 + other.m2 + np.where(n > 0, delta ** 2 * self.count * other.count / n, 0)
+
+        nc = self.complete_rows + other.complete_rows
+        delta_c = other.complete_mean - self.complete_mean
+        if nc:
+            complete_mean = self.complete_mean + delta_c * other.complete_rows / nc
+            comoment = (self.comoment + other.comoment
+                        + np.outer(delta_c, delta_c) * self.complete_rows * other.complete_rows / nc)
+        else:
+            complete_mean, comoment = self.complete_mean, self.comoment
+
+        return HousingStats(
+            columns=self.columns,
+            rows=self.rows + other.rows,
+            digest=digest,
+            count=n,
+            mean=mean,
+            m2=m2,
+            minimum=np.minimum(self.minimum, other.minimum),
+            maximum=np.maximum(self.maximum, other.maximum),
+            sorted_values=[_merge_sorted(a, b) for a, b in zip(self.sorted_values, other.sorted_values)],
+            complete_rows=nc,
+            complete_mean=complete_mean,
+            comoment=comoment,
+        )
+
+    def _series(self, values, name=None):
+        return pd.Series(values, index=self.columns, name=name, dtype=np.float64)
+
+    @property
+    def var(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._series(np.where(self.count > 1, self.m2 / (self.count - 1), np.nan))
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+    @property
+    def range(self):
+        return self._series(self.maximum - self.minimum)
+
+    def quantile(self, q):
+        """Linearly interpolated ``q`` quantile of every column, as pandas computes it."""
+        result = []
+        for values in self.sorted_values:
+            if len(values) == 0:
+                result.append(np.nan)
+                continue
+            position = q * (len(values) - 1)
+            low = int(np.floor(position))
+            high = min(low + 1, len(values) - 1)
+            result.append(values[low] + (values[high] - values[low]) * (position - low))
+        return self._series(result, name=q)
+
+    @property
+    def median(self):
+        return self.quantile(0.5)
+
+    @property
+    def mode(self):
+        """Most frequent value of every column (the smallest one on ties)."""
+        result = []
+        for values in self.sorted_values:
+            if len(values) == 0:
+                result.append(np.nan)
+                continue
+            starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+            runs = np.diff(np.r_[starts, len(values)])
+            result.append(values[starts[np.argmax(runs)]])
+        return self._series(result, name=0)
+
+    def describe(self):
+        """Same table as ``df.describe()`` for the numeric columns."""
+        return pd.DataFrame({
+            'count': self._series(self.count),
+            'mean': self._series(self.mean),
+            'std': self.std,
+            'min': self._series(self.minimum),
+            '25%': self.quantile(0.25),
+            '50%': self.median,
+            '75%': self.quantile(0.75),
+            'max': self._series(self.maximum),
+        }).T
+
+    def corr(self):
+        """Pearson correlation over the rows with no missing numeric value."""
+        scale = np.sqrt(np.diag(self.comoment))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = self.comoment / np.outer(scale, scale)
+        np.fill_diagonal(corr, np.where(scale > 0, 1.0, np.nan))
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def top_correlated(self, target, n=4):
+        """``target`` followed by the ``n`` columns most correlated with it (by absolute value)."""
+        ranking = self.corr()[target].drop(target).abs().dropna().sort_values(ascending=False, kind='stable')
+        return [target] + list(ranking.index[:n])
+
+
+def stats_for(df):
+    """Statistics of ``df``, extending the previous result when ``df`` only appended rows to it."""
+    global _latest
+    columns, X = numeric_matrix(df)
+    with _lock:
+        previous = _latest
+    stats = None
+    if previous is not None and previous.columns == columns and len(X) >= previous.rows:
+        # One hash pass covers both the prefix check and the new digest
+        hasher = _hasher(X[:previous.rows])
+        if hasher.hexdigest() == previous.digest:
+            if len(X) == previous.rows:
+                return previous
+            hasher.update(memoryview(np.ascontiguousarray(X[previous.rows:])))
+            stats = previous.merge(HousingStats.from_matrix(columns, X[previous.rows:]), digest=hasher.hexdigest())
+    if stats is None:
+        stats = HousingStats.from_matrix(columns, X)
+    with _lock:
+        _latest = stats
+    return stats
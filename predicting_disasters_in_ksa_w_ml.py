@@ -1,110 +1,55 @@
-# -*- coding: utf-8 -*-
-"""Predicting disasters in KSA w ML.ipynb
+"""Predicting Deadly Disasters in Saudi Arabia Using Machine Learning.
 
-Automatically generated by Colab.
+Originally exported from the Colab notebook "Predicting disasters in KSA w ML".
+It builds two classifiers on ``merged_output.csv``:
 
-Original file is located at
-    https://colab.research.google.com/drive/1-l3Zo0Vv5g6LLYcLLoTzskkyfwhR37tN
+* Is_Deadly: whether a disaster caused at least one death
+* Severity_Level: Low / Medium / High, binned from Total Damage
 
-#**Predicting Deadly Disasters in Saudi Arabia Using Machine Learning**
+Logistic Regression and Random Forest are trained for each target on
+pre-outcome features only (one-hot encoded, SMOTE-balanced, scaled, 80/20
+split). The Is_Deadly logistic regression and the Severity_Level random
+forest score the full dataset.
 
-# 1. Introduction
+The work runs as a series of stages:
 
-This notebook builds two classification models based on disaster data in Saudi Arabia:
+    load -> label -> encode -> balance -> train -> evaluate -> score -> export
 
-Predict if a disaster is deadly (Is_Deadly = 1 if at least one death occurred)
+Each stage is timed, and its output is cached under ``models/pipeline``. The
+cache key is a hash of the stage's own parameters and the keys of its inputs,
+so a rerun only recomputes the stages whose inputs changed:
 
-Predict the severity level (Low / Medium / High) based on estimated damage
+    python predicting_disasters_in_ksa_w_ml.py [--data merged_output.csv] [--until STAGE]
+        [--force STAGE ...] [--plots DIR] [--no-cache]
 
-These models help support early warning and decision-making in crisis response.
-We applied Logistic Regression and Random Forest to assess model performance.
-
-
-
----
-
-# 2. Dataset Description
-The dataset contains records of disasters with:
-
-Type, region, year, and country
-
-Magnitude and reported deaths
-
-Estimated damages
-
-Two target variables were created:
-
-Is_Deadly: binary, based on Total Deaths
-
-Severity_Level: categorical, based on Total Damage
-
-
----
-
-# 3.Library Imports and Data Loading
-We will load the disaster dataset (after cleaning) first and then perform necessary imports.
+Plots are only drawn with ``--plots DIR``, which saves them there as PNGs.
 """
+import argparse
+import hashlib
+import json
+import os
+import time
 
-!pip install -q imbalanced-learn
-
-#imports
+import joblib
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 
-from imblearn.over_sampling import SMOTE
+from disaster_model import FEATURES, FeatureEncoder, artifact_path, save_artifact
+from snapshot import file_sha256
+from training import RANDOM_STATE, TARGETS, add_targets, balance_and_split, encode_target
 
-sns.set(style="whitegrid")
+STAGES = ['load', 'label', 'encode', 'balance', 'train', 'evaluate', 'score', 'export']
+CACHE_DIR = os.path.join("models", "pipeline")
+# Bump when a stage's code changes so cached outputs are not reused
+PIPELINE_VERSION = 1
 
-df = pd.read_csv("merged_output.csv")
+DEADLY_OUTPUT = "disaster_predictions_logreg.csv"
+SEVERITY_OUTPUT = "disaster_predictions_with_severity.csv"
 
-print("Dataset Loaded!")
-print("\n- Shape:", df.shape)
-print("\n- Columns:\n", df.columns.tolist())
-print("\n- Info:")
-df.info()
-
-df.head()
-
-"""#4. Data Preprocessing
-##We perform the following preprocessing steps:
-
-One-hot Encoding: Converts categorical variables (like disaster type and region) into numerical format suitable for ML models.
-
-Target Creation: The Is_Deadly column is created based on the Total Deaths.
-
-Feature Selection: Irrelevant or leakage-prone columns are excluded.
-
-Balancing the Dataset: Since most disasters are non-deadly, the dataset is imbalanced. We apply SMOTE (Synthetic Minority Oversampling Technique) to balance the classes.
-
-Train-Test Split: The balanced dataset is split into training and testing sets (80/20 split).
-
-Scaling: Features are standardized to have zero mean and unit variance.
-"""
-
-# Create target: Is_Deadly (binary)
-df["Is_Deadly"] = df["Total Deaths"].apply(lambda x: 1 if x > 0 else 0)
-
-# Create Severity Level based on Total Damage
-def classify_severity(damage):
-    if damage < 100000:
-        return "Low"
-    elif damage < 1000000:
-        return "Medium"
-    else:
-        return "High"
-
-df["Severity_Level"] = df["Total Damage ('000 US$)"].apply(classify_severity)
-
-# List of irrelevant columns to drop
-columns_to_drop = [
+# Irrelevant or leakage-prone columns, dropped before the predictions are saved
+COLUMNS_TO_DROP = [
     'DisNo.',
     'ISO',
     'Entry Date',
@@ -117,351 +62,267 @@ columns_to_drop = [
     'CPI'
 ]
 
-# Drop only existing columns to avoid errors
-safe_to_drop = [col for col in columns_to_drop if col in df.columns]
-df.drop(columns=safe_to_drop, inplace=True)
-
-# Show results
-print("Dropped columns (if existed):", safe_to_drop)
-print("Cleaned dataset shape:", df.shape)
-
-# Preview the important columns
-df[['Total Deaths', 'Is_Deadly', "Total Damage ('000 US$)", 'Severity_Level']].head()
-
-"""#5. Is_Deadly Classification
-Goal: Predict whether a disaster causes death or not.
-
-Steps:
-
-Created binary label from Total Deaths
-
-Trained Logistic Regression and Random Forest
-
-Evaluated using accuracy and confusion matrix
-
-
-"""
-
-# Class balance for Is_Deadly
-plt.figure(figsize=(6, 4))
-sns.countplot(x='Is_Deadly', data=df, palette='Set2')
-plt.title('Class Distribution: Is_Deadly')
-plt.xticks([0, 1], ['Not Deadly', 'Deadly'])
-plt.xlabel('Disaster Outcome')
-plt.ylabel('Count')
-plt.show()
-
-"""#6. Severity Level Classification
-Goal: Predict damage severity: Low, Medium, or High.
-
-Steps:
-
-Converted numeric damage into 3 bins
-
-Reused encoded features
-
-Trained both models again
-
-Evaluated using classification report and confusion matrix
-
-
-"""
-
-# Class balance for Severity_Level
-plt.figure(figsize=(6, 4))
-sns.countplot(x='Severity_Level', data=df, order=['Low', 'Medium', 'High'], palette='Set1')
-plt.title('Severity Level Distribution')
-plt.xlabel('Severity')
-plt.ylabel('Count')
-plt.show()
-
-# Most common disaster types
-plt.figure(figsize=(10, 4))
-sns.countplot(y='Disaster Type', data=df, order=df['Disaster Type'].value_counts().index, palette='coolwarm')
-plt.title('Top Disaster Types')
-plt.xlabel('Count')
-plt.ylabel('Disaster Type')
-plt.tight_layout()
-plt.show()
-
-"""#7.Predicting Is_Deadly
-Goal: Predict whether a disaster caused at least one death.
-
-Steps:
-
-Created binary label from Total Deaths
-
-Selected only pre-outcome features
-
-Used one-hot encoding
-
-Balanced dataset with SMOTE
-
-Trained Logistic Regression and Random Forest
-
-Evaluated using classification report and confusion matrix
-
-
-"""
-
-# Select features that are known BEFORE knowing the outcome
-features = [
-    'Disaster Type', 'Region', 'Country',
-    'Start Year', 'Start Month',
-    'Magnitude', 'Magnitude Scale'
-]
-
-# Target: Is_Deadly
-target = 'Is_Deadly'
-
-# Subset the data
-df_model = df[features + [target]].copy()
-
-# One-hot encode categorical features
-df_model = pd.get_dummies(df_model, columns=['Disaster Type', 'Region', 'Country', 'Magnitude Scale'], drop_first=True)
-
-# Split X and y
-X = df_model.drop(target, axis=1)
-y = df_model[target]
-
-# Balance the classes using SMOTE
-smote = SMOTE(random_state=42)
-X_resampled, y_resampled = smote.fit_resample(X, y)
-
-# Scale the features
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X_resampled)
-
-# Train/Test Split
-X_train, X_test, y_train, y_test = train_test_split(X_scaled, y_resampled, test_size=0.2, random_state=42)
-
-print("Feature engineering complete!")
-print(" X_train shape:", X_train.shape)
-print(" y_train distribution:\n", pd.Series(y_train).value_counts())
-
-# Logistic Regression
-logreg = LogisticRegression(max_iter=1000)
-logreg.fit(X_train, y_train)
-log_preds = logreg.predict(X_test)
-
-# Random Forest
-rf = RandomForestClassifier(random_state=42)
-rf.fit(X_train, y_train)
-rf_preds = rf.predict(X_test)
-
-# Evaluation
-def evaluate_model(name, y_true, y_pred):
-    print(f"\n {name} Accuracy: {accuracy_score(y_true, y_pred):.2%}")
-    print(classification_report(y_true, y_pred, target_names=["Not Deadly", "Deadly"]))
-
-# Evaluate both
-evaluate_model("Logistic Regression", y_test, log_preds)
-evaluate_model("Random Forest", y_test, rf_preds)
-
-# Confusion Matrix for Random Forest
-cm = confusion_matrix(y_test, rf_preds)
-sns.heatmap(cm, annot=True, fmt="d", cmap="Blues", xticklabels=["Not Deadly", "Deadly"], yticklabels=["Not Deadly", "Deadly"])
-plt.xlabel("Predicted")
-plt.ylabel("Actual")
-plt.title("Confusion Matrix: Random Forest")
-plt.show()
-
-# Rebuild the same features on the full dataset (no train/test split)
-df_full = df.copy()
-
-# One-hot encode just like before
-df_full_model = pd.get_dummies(
-    df_full[features],
-    columns=['Disaster Type', 'Region', 'Country', 'Magnitude Scale'],
-    drop_first=True
-)
-
-# Ensure the encoded columns match the model’s training features
-missing_cols = set(X.columns) - set(df_full_model.columns)
-for col in missing_cols:
-    df_full_model[col] = 0
-df_full_model = df_full_model[X.columns]  # Reorder to match model
-
-# Scale features
-df_full_scaled = scaler.transform(df_full_model)
-
-# Predict using trained Logistic Regression model instead of RF
-df['Predicted_Is_Deadly'] = logreg.predict(df_full_scaled)
-
-# Save to CSV
-df.to_csv("disaster_predictions_logreg.csv", index=False)
-print("Saved Logistic Regression predictions to 'disaster_predictions_logreg.csv'")
-
-# Evaluate on training set
-train_preds = rf.predict(X_train)
-train_acc = accuracy_score(y_train, train_preds)
-
-# Evaluate on test set (already done earlier)
-test_preds = rf.predict(X_test)
-test_acc = accuracy_score(y_test, test_preds)
-
-print(f" Training Accuracy: {train_acc:.2%}")
-print(f" Test Accuracy: {test_acc:.2%}")
-
-"""#8.Predicting Severity_Level
-Goal: Classify disaster into severity levels based on damage.
-
-Steps:
-
-Converted numeric damage to 3-class label
-
-Used same encoded features
-
-Trained both Logistic Regression and Random Forest
-
-Evaluated results using accuracy, classification report, confusion matrix
-"""
-
-from sklearn.preprocessing import LabelEncoder
-
-# Set features (same as before)
-severity_features = [
-    'Disaster Type', 'Region', 'Country',
-    'Start Year', 'Start Month',
-    'Magnitude', 'Magnitude Scale'
-]
-
-target = 'Severity_Level'
-
-# Subset and clean
-df_sev = df[severity_features + [target]].copy()
-
-# Encode target labels (Low=0, Medium=1, High=2)
-label_encoder = LabelEncoder()
-df_sev[target] = label_encoder.fit_transform(df_sev[target])
-
-# One-hot encode categorical features
-df_sev = pd.get_dummies(df_sev, columns=['Disaster Type', 'Region', 'Country', 'Magnitude Scale'], drop_first=True)
-
-# Split X and y
-X_sev = df_sev.drop(target, axis=1)
-y_sev = df_sev[target]
-
-# Optionally balance with SMOTE
-smote = SMOTE(random_state=42)
-X_resampled_sev, y_resampled_sev = smote.fit_resample(X_sev, y_sev)
-
-# Scale features
-X_rescaled_sev = scaler.fit_transform(X_resampled_sev)
-
-# Train/Test split
-X_train_sev, X_test_sev, y_train_sev, y_test_sev = train_test_split(X_rescaled_sev, y_resampled_sev, test_size=0.2, random_state=42)
-
-print("Severity data prepared!")
-print("X_train shape:", X_train_sev.shape)
-print("y_train value counts:\n", pd.Series(y_train_sev).value_counts())
-
-from sklearn.metrics import classification_report, confusion_matrix
-
-# Logistic Regression
-logreg_sev = LogisticRegression(max_iter=1000)
-logreg_sev.fit(X_train_sev, y_train_sev)
-log_preds_sev = logreg_sev.predict(X_test_sev)
-
-# Random Forest
-rf_sev = RandomForestClassifier(random_state=42)
-rf_sev.fit(X_train_sev, y_train_sev)
-rf_preds_sev = rf_sev.predict(X_test_sev)
-
-# Evaluation function
-def eval_model(name, y_true, y_pred):
-    print(f"\n{name} Accuracy: {accuracy_score(y_true, y_pred):.2%}")
-    print(classification_report(y_true, y_pred, target_names=label_encoder.classes_))
-
-# Evaluate both models
-eval_model("Logistic Regression", y_test_sev, log_preds_sev)
-eval_model("Random Forest", y_test_sev, rf_preds_sev)
-
-# Confusion Matrix for Random Forest
-cm = confusion_matrix(y_test_sev, rf_preds_sev)
-plt.figure(figsize=(6, 5))
-sns.heatmap(cm, annot=True, fmt='d', cmap="YlGnBu",
-            xticklabels=label_encoder.classes_,
-            yticklabels=label_encoder.classes_)
-plt.xlabel("Predicted")
-plt.ylabel("Actual")
-plt.title("Confusion Matrix: Severity Level (Random Forest)")
-plt.show()
-
-# Prepare features from the full dataset
-df_sev_full = df.copy()
-
-# One-hot encode as before
-df_sev_full_model = pd.get_dummies(
-    df_sev_full[severity_features],
-    columns=['Disaster Type', 'Region', 'Country', 'Magnitude Scale'],
-    drop_first=True
-)
-
-# Match column structure to training features
-missing_cols = set(X_sev.columns) - set(df_sev_full_model.columns)
-for col in missing_cols:
-    df_sev_full_model[col] = 0
-df_sev_full_model = df_sev_full_model[X_sev.columns]
-
-# Scale using the same scaler
-df_sev_full_scaled = scaler.transform(df_sev_full_model)
-
-# Predict with Random Forest
-sev_preds = rf_sev.predict(df_sev_full_scaled)
-
-# Decode back to original labels (Low/Medium/High)
-df["Predicted_Severity_Level"] = label_encoder.inverse_transform(sev_preds)
-
-# Save the enriched dataset
-df.to_csv("disaster_predictions_with_severity.csv", index=False)
-print("Saved predictions to 'disaster_predictions_with_severity.csv'")
-
-"""#9.Feature Importance
-Used feature_importances_ from Random Forest to plot top contributing features
-
-Separate importance graphs were made for:
-
-Is_Deadly prediction
-
-Severity_Level prediction
-
-These visuals help explain what drives the model predictions.
-
-
-"""
-
-# Get feature importances from the trained Random Forest
-#This shows which features most influenced Severity_Level predictions.
-importances = rf_sev.feature_importances_
-feature_names = X_sev.columns
-
-# Combine into a DataFrame
-feat_df = pd.DataFrame({
-    'Feature': feature_names,
-    'Importance': importances
-}).sort_values(by='Importance', ascending=False)
-
-# Plot top 10
-plt.figure(figsize=(10, 6))
-sns.barplot(data=feat_df.head(10), x='Importance', y='Feature', palette="viridis")
-plt.title("Top 10 Important Features for Severity Level Prediction")
-plt.xlabel("Feature Importance Score")
-plt.ylabel("Feature")
-plt.tight_layout()
-plt.show()
-
-"""#10. Use Cases
-Support for early warning systems
-
-Helps emergency response teams prioritize deadly or high-damage events
-
-Can be integrated into disaster risk dashboards
-
-#11.Limitations
-Damage estimates and death counts may not be fully reliable
-
-Historical patterns may not reflect future disasters (e.g. climate change)
-
-More context features (e.g. population density, weather) would improve the model
-"""
\ No newline at end of file
+# Model exported for each target (the notebook's choice)
+EXPORTED_MODELS = {'Is_Deadly': 'logreg', 'Severity_Level': 'rf'}
+CLASS_NAMES = {'Is_Deadly': ["Not Deadly", "Deadly"]}
+
+
+class Pipeline:
+    """Runs stages in order, caching each output under a content-derived key."""
+
+    def __init__(self, cache_dir=CACHE_DIR, use_cache=True, force=()):
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.force = set(force)
+        self.keys = {}
+        self.outputs = {}
+        self.timings = []
+
+    def run(self, name, func, inputs=(), params=None):
+        """Return ``func(*inputs)``, or its cached value when the key is unchanged.
+
+        ``inputs`` are the names of earlier stages; their outputs are passed
+        to ``func`` and their keys are part of this stage's key.
+        """
+        payload = json.dumps({
+            "stage": name, "version": PIPELINE_VERSION, "params": params,
+            "inputs": [self.keys[stage] for stage in inputs],
+        }, sort_keys=True, default=str)
+        key = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+        self.keys[name] = key
+        path = os.path.join(self.cache_dir, f"{name}-{key}.joblib")
+
+        start = time.perf_counter()
+        # A forced stage also forces everything downstream of it
+        forced = name in self.force or any(stage in self.force for stage in inputs)
+        if forced:
+            self.force.add(name)
+        if self.use_cache and not forced and os.path.exists(path):
+            value, cached = joblib.load(path), True
+        else:
+            value, cached = func(*[self.outputs[stage] for stage in inputs]), False
+            if self.use_cache:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                joblib.dump(value, path)
+        self.outputs[name] = value
+        self.timings.append((name, time.perf_counter() - start, cached))
+        return value
+
+
+def load(data_path):
+    return pd.read_csv(data_path)
+
+
+def label(df):
+    """Add the Is_Deadly and Severity_Level targets."""
+    return add_targets(df.copy())
+
+
+def encode(df):
+    # Both targets use the same pre-outcome features, so one encoding serves both
+    encoder = FeatureEncoder(FEATURES).fit(df)
+    return {"encoder": encoder, "X": encoder.transform(df)}
+
+
+def balance(df, encoded):
+    prepared = {}
+    for target in TARGETS:
+        y, label_encoder = encode_target(df, target)
+        prepared[target] = dict(
+            balance_and_split(encoded["X"], y, encoded["encoder"], RANDOM_STATE),
+            label_encoder=label_encoder,
+        )
+    return prepared
+
+
+def train(prepared):
+    models = {}
+    for target, data in prepared.items():
+        models[target] = {
+            "logreg": LogisticRegression(max_iter=1000).fit(data["X_train"], data["y_train"]),
+            "rf": RandomForestClassifier(random_state=RANDOM_STATE).fit(data["X_train"], data["y_train"]),
+        }
+    return models
+
+
+def evaluate(prepared, models):
+    """Accuracy, classification report and confusion matrix for every model."""
+    report = {}
+    for target, data in prepared.items():
+        label_encoder = data["label_encoder"]
+        names = list(label_encoder.classes_) if label_encoder is not None else CLASS_NAMES[target]
+        for family, model in models[target].items():
+            preds = model.predict(data["X_test"])
+            report[(target, family)] = {
+                "train_accuracy": accuracy_score(data["y_train"], model.predict(data["X_train"])),
+                "test_accuracy": accuracy_score(data["y_test"], preds),
+                "report": classification_report(data["y_test"], preds, target_names=names),
+                "confusion": confusion_matrix(data["y_test"], preds),
+                "labels": names,
+            }
+    return report
+
+
+def score(df, encoded, prepared, models):
+    """Score the full dataset with the exported model of each target."""
+    predictions = {}
+    for target, family in EXPORTED_MODELS.items():
+        data = prepared[target]
+        preds = models[target][family].predict(data["scaler"].transform(encoded["X"]))
+        if data["label_encoder"] is not None:
+            preds = data["label_encoder"].inverse_transform(preds)
+        predictions[target] = preds
+    return pd.DataFrame({
+        'Predicted_Is_Deadly': predictions['Is_Deadly'],
+        'Predicted_Severity_Level': predictions['Severity_Level'],
+    }, index=df.index)
+
+
+def export(df, encoded, prepared, models, predictions, output_dir="."):
+    """Write the two prediction CSVs and the model artifact; returns their paths."""
+    # DisNo. is kept so the dashboard joins the predictions on it rather than on row order
+    saved = df.drop(columns=[col for col in COLUMNS_TO_DROP if col in df.columns and col != 'DisNo.'])
+    deadly_path = os.path.join(output_dir, DEADLY_OUTPUT)
+    severity_path = os.path.join(output_dir, SEVERITY_OUTPUT)
+    saved.assign(Predicted_Is_Deadly=predictions['Predicted_Is_Deadly']).to_csv(deadly_path, index=False)
+    saved.assign(
+        Predicted_Is_Deadly=predictions['Predicted_Is_Deadly'],
+        Predicted_Severity_Level=predictions['Predicted_Severity_Level'],
+    ).to_csv(severity_path, index=False)
+
+    deadly, severity = prepared['Is_Deadly'], prepared['Severity_Level']
+    model_path = artifact_path(output_dir)
+    save_artifact(
+        model_path,
+        deadly_model=models['Is_Deadly'][EXPORTED_MODELS['Is_Deadly']], deadly_scaler=deadly["scaler"],
+        deadly_encoder=encoded["encoder"],
+        severity_model=models['Severity_Level'][EXPORTED_MODELS['Severity_Level']],
+        severity_scaler=severity["scaler"], severity_encoder=encoded["encoder"],
+        label_encoder=severity["label_encoder"],
+    )
+    return [deadly_path, severity_path, model_path]
+
+
+def plot(df, encoded, models, evaluation, plot_dir):
+    """Save the notebook's figures as PNGs in ``plot_dir``."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    sns.set(style="whitegrid")
+    os.makedirs(plot_dir, exist_ok=True)
+
+    def save(name):
+        plt.tight_layout()
+        plt.savefig(os.path.join(plot_dir, f"{name}.png"))
+        plt.close()
+
+    # Class balance and most common disaster types
+    plt.figure(figsize=(6, 4))
+    sns.countplot(x='Is_Deadly', data=df, palette='Set2')
+    plt.title('Class Distribution: Is_Deadly')
+    plt.xticks([0, 1], ['Not Deadly', 'Deadly'])
+    plt.xlabel('Disaster Outcome')
+    plt.ylabel('Count')
+    save("is_deadly_distribution")
+
+    plt.figure(figsize=(6, 4))
+    sns.countplot(x='Severity_Level', data=df, order=['Low', 'Medium', 'High'], palette='Set1')
+    plt.title('Severity Level Distribution')
+    plt.xlabel('Severity')
+    plt.ylabel('Count')
+    save("severity_distribution")
+
+    plt.figure(figsize=(10, 4))
+    sns.countplot(y='Disaster Type', data=df, order=df['Disaster Type'].value_counts().index, palette='coolwarm')
+    plt.title('Top Disaster Types')
+    plt.xlabel('Count')
+    plt.ylabel('Disaster Type')
+    save("disaster_types")
+
+    # Confusion matrices of the random forests
+    for target, cmap in [('Is_Deadly', "Blues"), ('Severity_Level', "YlGnBu")]:
+        result = evaluation[(target, 'rf')]
+        plt.figure(figsize=(6, 5))
+        sns.heatmap(result["confusion"], annot=True, fmt="d", cmap=cmap,
+                    xticklabels=result["labels"], yticklabels=result["labels"])
+        plt.xlabel("Predicted")
+        plt.ylabel("Actual")
+        plt.title(f"Confusion Matrix: {target} (Random Forest)")
+        save(f"confusion_{target.lower()}")
+
+    # Features that most influenced the Severity_Level predictions
+    feat_df = pd.DataFrame({
+        'Feature': encoded["encoder"].columns_,
+        'Importance': models['Severity_Level']['rf'].feature_importances_,
+    }).sort_values(by='Importance', ascending=False)
+    plt.figure(figsize=(10, 6))
+    sns.barplot(data=feat_df.head(10), x='Importance', y='Feature', palette="viridis")
+    plt.title("Top 10 Important Features for Severity Level Prediction")
+    plt.xlabel("Feature Importance Score")
+    plt.ylabel("Feature")
+    save("severity_feature_importance")
+
+
+def run(data_path="merged_output.csv", until=STAGES[-1], force=(), plot_dir=None,
+        cache_dir=CACHE_DIR, use_cache=True, output_dir="."):
+    """Run the stages up to and including ``until``; returns the Pipeline and the outputs."""
+    stages = STAGES[:STAGES.index(until) + 1]
+    pipeline = Pipeline(cache_dir, use_cache, force)
+    steps = {
+        'load': lambda: pipeline.run('load', lambda: load(data_path), params=file_sha256(data_path)),
+        'label': lambda: pipeline.run('label', label, ['load']),
+        'encode': lambda: pipeline.run('encode', encode, ['label'], params=FEATURES),
+        'balance': lambda: pipeline.run('balance', balance, ['label', 'encode'], params=RANDOM_STATE),
+        'train': lambda: pipeline.run('train', train, ['balance']),
+        'evaluate': lambda: pipeline.run('evaluate', evaluate, ['balance', 'train']),
+        'score': lambda: pipeline.run('score', score, ['label', 'encode', 'balance', 'train']),
+        'export': lambda: pipeline.run(
+            'export', lambda *args: export(*args, output_dir=output_dir),
+            ['label', 'encode', 'balance', 'train', 'score'], params=os.path.abspath(output_dir),
+        ),
+    }
+    # Outputs written by an earlier run may have been deleted since
+    if 'export' in stages and not all(os.path.exists(path) for path in
+                                      [os.path.join(output_dir, DEADLY_OUTPUT),
+                                       os.path.join(output_dir, SEVERITY_OUTPUT),
+                                       artifact_path(output_dir)]):
+        pipeline.force.add('export')
+    outputs = {stage: steps[stage]() for stage in stages}
+    if plot_dir and 'evaluate' in outputs:
+        start = time.perf_counter()
+        plot(outputs['label'], outputs['encode'], outputs['train'], outputs['evaluate'], plot_dir)
+        pipeline.timings.append(('plot', time.perf_counter() - start, False))
+    return pipeline, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and apply the KSA disaster models stage by stage.")
+    parser.add_argument("--data", default="merged_output.csv", help="events CSV (default: merged_output.csv)")
+    parser.add_argument("--until", choices=STAGES, default=STAGES[-1], help="last stage to run (default: export)")
+    parser.add_argument("--force", nargs="+", choices=STAGES, default=[],
+                        help="recompute these stages (and everything after them) even if cached")
+    parser.add_argument("--plots", metavar="DIR", help="save the figures as PNGs in DIR")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="stage cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the stage cache")
+    parser.add_argument("--output-dir", default=".", help="where the prediction CSVs and models/ are written")
+    args = parser.parse_args()
+
+    pipeline, outputs = run(args.data, args.until, args.force, args.plots,
+                            args.cache_dir, not args.no_cache, args.output_dir)
+
+    if 'evaluate' in outputs:
+        for (target, family), result in outputs['evaluate'].items():
+            print(f"\n{target} {family}: train={result['train_accuracy']:.2%} test={result['test_accuracy']:.2%}")
+            print(result["report"])
+    if 'export' in outputs:
+        print("Saved " + ", ".join(f"'{path}'" for path in outputs['export']))
+
+    for name, seconds, cached in pipeline.timings:
+        print(f"{name:<9} {seconds:7.2f}s {'(cached)' if cached else ''}")
+    print(f"{'total':<9} {sum(seconds for _, seconds, _ in pipeline.timings):7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
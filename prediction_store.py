@@ -0,0 +1,61 @@
+"""Append-only store of model predictions keyed by ``DisNo.``.
+
+Each scored event is a row holding a hash of its model features, both
+predictions and the version of the model that produced them. Re-scored
+events are appended again; readers keep the latest row per ``DisNo.``.
+Only depends on pandas, so the dashboard can read it without scikit-learn.
+"""
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+
+STORE_FILE = os.path.join("models", "predictions.csv")
+ID_COLUMN = 'DisNo.'
+COLUMNS = [ID_COLUMN, 'Row Hash', 'Predicted_Is_Deadly', 'Predicted_Severity_Level', 'Model Version', 'Scored At']
+
+
+def store_path(data_dir="."):
+    return os.path.join(data_dir, STORE_FILE)
+
+
+def row_hashes(df, features):
+    """Stable uint64 hash of each event's model features, indexed by ``DisNo.``."""
+    hashes = pd.util.hash_pandas_object(df[features], index=False)
+    return pd.Series(hashes.to_numpy(), index=pd.Index(df[ID_COLUMN].to_numpy(), name=ID_COLUMN), name='Row Hash')
+
+
+def read_store(path=None):
+    """Latest prediction per event, indexed by ``DisNo.`` (empty if there is no store)."""
+    path = path or store_path()
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=COLUMNS[1:], index=pd.Index([], name=ID_COLUMN))
+    store = pd.read_csv(path, dtype={'Row Hash': 'uint64'})
+    return store.drop_duplicates(ID_COLUMN, keep='last').set_index(ID_COLUMN)
+
+
+def _records(predictions, hashes, model_version):
+    records = predictions.copy()
+    records['Row Hash'] = hashes.reindex(records.index).to_numpy()
+    records['Model Version'] = model_version
+    records['Scored At'] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    return records.reset_index()[COLUMNS]
+
+
+def append(predictions, hashes, model_version, path=None):
+    """Append ``predictions`` (indexed by ``DisNo.``) to the store."""
+    path = path or store_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    records = _records(predictions, hashes, model_version)
+    records.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+    return len(records)
+
+
+def rewrite(predictions, hashes, model_version, path=None):
+    """Replace the whole store, e.g. after a full retrain."""
+    path = path or store_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    _records(predictions, hashes, model_version).to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return len(predictions)
@@ -0,0 +1,184 @@
+"""Opt-in per-section timing and memory profiling for the Streamlit apps.
+
+Profiling is off unless the ``DASHBOARD_PROFILE`` environment variable is
+set (every session) or the page is opened with ``?profile=1`` (that session
+only). While it is off, ``Profiler.section`` is a no-op.
+
+While it is on, each section of a rerun records its wall time. With
+``DASHBOARD_PROFILE`` set, the whole process also runs under ``tracemalloc``,
+and each section records the memory it left allocated and its peak
+allocation above the memory allocated at its start. Tracing slows down every
+session and its peak is process-wide, so ``?profile=1`` sessions are timing
+only, and a section that overlaps another session's section records no
+memory figures. The sidebar shows the breakdown of the latest rerun. Each rerun is also exported to ``DASHBOARD_PROFILE_DIR``
+(default ``profiling/``) in two forms:
+
+* ``<app>.jsonl``: one JSON line per rerun
+* ``<app>.prom``: cumulative Prometheus metrics in text exposition format,
+  for node_exporter's textfile collector
+"""
+import contextlib
+import datetime
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+import streamlit as st
+
+PROFILE_ENV = "DASHBOARD_PROFILE"
+PROFILE_DIR_ENV = "DASHBOARD_PROFILE_DIR"
+PROFILE_DIR = "profiling"
+
+# Reentrant: export() holds it while rendering the metrics
+_lock = threading.RLock()
+# (app, section) -> [runs, total seconds, last seconds, last peak bytes], across sessions
+_totals = {}
+# Traced sections running now / started so far, to spot overlapping ones
+_active_sections = 0
+_started_sections = 0
+
+
+def process_profiling_enabled():
+    return os.environ.get(PROFILE_ENV, "").lower() not in ("", "0", "false")
+
+
+def profiling_enabled():
+    if process_profiling_enabled():
+        return True
+    return st.query_params.get("profile", "0").lower() not in ("0", "false")
+
+
+class Profiler:
+    def __init__(self, app, enabled=None):
+        self.app = app
+        self.enabled = profiling_enabled() if enabled is None else enabled
+        self.trace_memory = self.enabled and process_profiling_enabled()
+        self.sections = []
+        self.started = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def section(self, name):
+        """Time the enclosed block (sections should not be nested)."""
+        if not self.enabled:
+            yield
+            return
+        if not self.trace_memory:
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                self.sections.append({"section": name, "seconds": time.perf_counter() - start,
+                                      "allocated_bytes": None, "peak_bytes": None})
+            return
+        global _active_sections, _started_sections
+        with _lock:
+            _active_sections += 1
+            _started_sections += 1
+            overlapped, started_sections = _active_sections > 1, _started_sections
+            tracemalloc.reset_peak()
+            allocated_before, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with _lock:
+                allocated, peak = tracemalloc.get_traced_memory()
+                # Other sections' allocations and peak resets make the figures meaningless
+                overlapped = overlapped or _active_sections > 1 or _started_sections != started_sections
+                _active_sections -= 1
+            self.sections.append({
+                "section": name,
+                "seconds": seconds,
+                "allocated_bytes": None if overlapped else allocated - allocated_before,
+                "peak_bytes": None if overlapped else peak - allocated_before,
+            })
+
+    def frame(self):
+        frame = pd.DataFrame(self.sections, columns=["section", "seconds", "allocated_bytes", "peak_bytes"])
+        return pd.DataFrame({
+            "Section": frame["section"],
+            "Time (ms)": frame["seconds"] * 1000,
+            # Blank when the memory was not traced
+            "Allocated (MB)": pd.to_numeric(frame["allocated_bytes"]) / 1e6,
+            "Peak (MB)": pd.to_numeric(frame["peak_bytes"]) / 1e6,
+        })
+
+    def record(self):
+        """JSON record of this rerun."""
+        return {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "app": self.app,
+            "total_seconds": time.perf_counter() - self.started,
+            "sections": self.sections,
+        }
+
+    def export(self, directory=None):
+        """Append this rerun to ``<app>.jsonl`` and rewrite ``<app>.prom``; returns the record."""
+        directory = directory or os.environ.get(PROFILE_DIR_ENV, PROFILE_DIR)
+        record = self.record()
+        with _lock:
+            for entry in self.sections:
+                totals = _totals.setdefault((self.app, entry["section"]), [0, 0.0, 0.0, None])
+                totals[0] += 1
+                totals[1] += entry["seconds"]
+                totals[2] = entry["seconds"]
+                if entry["peak_bytes"] is not None:
+                    totals[3] = entry["peak_bytes"]
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"{self.app}.jsonl"), "a") as f:
+                f.write(json.dumps(record) + "\n")
+            # Written to a temporary file and renamed so a scrape never sees a partial file
+            path = os.path.join(directory, f"{self.app}.prom")
+            with open(path + ".tmp", "w") as f:
+                f.write(prometheus_metrics(self.app))
+            os.replace(path + ".tmp", path)
+        return record
+
+    def render(self, container=st.sidebar):
+        """Export this rerun and show its breakdown in an expander of ``container``."""
+        if not self.enabled:
+            return
+        record = self.export()
+        with container.expander("Profiling", expanded=True):
+            if self.trace_memory:
+                st.caption(f"Rerun took {record['total_seconds'] * 1000:.0f} ms; memory is Python allocations "
+                           "traced by tracemalloc (blank where another session ran at the same time)")
+            else:
+                st.caption(f"Rerun took {record['total_seconds'] * 1000:.0f} ms; memory is only traced "
+                           f"when the server runs with {PROFILE_ENV}=1")
+            st.dataframe(self.frame().round(2), hide_index=True)
+            st.download_button("Prometheus metrics", data=lambda: prometheus_metrics(self.app),
+                               file_name=f"{self.app}.prom", mime="text/plain", on_click="ignore")
+            st.download_button("JSONL record", data=lambda: json.dumps(record) + "\n",
+                               file_name=f"{self.app}.jsonl", mime="application/jsonl", on_click="ignore")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_metrics(app=None):
+    """Cumulative section metrics of this process in Prometheus text format."""
+    with _lock:
+        items = sorted((key, list(totals)) for key, totals in _totals.items() if app is None or key[0] == app)
+    metrics = [
+        ("dashboard_section_runs_total", "counter", "Reruns that executed the section", 0),
+        ("dashboard_section_seconds_total", "counter", "Time spent in the section", 1),
+        ("dashboard_section_last_seconds", "gauge", "Time the latest run of the section took", 2),
+        ("dashboard_section_last_peak_bytes", "gauge", "Peak traced allocation of the latest run", 3),
+    ]
+    lines = []
+    for name, kind, help_text, field in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (app_name, section), totals in items:
+            if totals[field] is None:
+                continue
+            lines.append(f'{name}{{app="{_escape(app_name)}",section="{_escape(section)}"}} {totals[field]}')
+    return "\n".join(lines) + "\n"
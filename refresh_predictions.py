@@ -0,0 +1,166 @@
+"""Incremental scoring of new or changed events in merged_output.csv.
+
+    python refresh_predictions.py [--data-dir .] [--max-row-growth 0.2] [--max-psi 0.2] [--retrain]
+
+Every event's model features are hashed and compared, by ``DisNo.``, with
+the prediction store. Only new or changed events, or events scored by an
+older model, are scored with the persisted models and appended to the
+store. The models are retrained (through train_models.py) only when the
+event count has grown by more than ``--max-row-growth`` since the last
+training, or when a feature's distribution has drifted by more than
+``--max-psi`` (population stability index).
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import prediction_store
+import train_models
+from data_loader import EVENTS_FILE
+from disaster_model import FEATURES, artifact_path, load_artifact, predict
+from snapshot import file_sha256
+
+TRAINING_STATE_FILE = os.path.join("models", "training_state.json")
+CATEGORICAL_DRIFT_FEATURES = ['Disaster Type', 'Magnitude Scale', 'Start Month']
+NUMERIC_DRIFT_FEATURES = ['Magnitude']
+PSI_EPSILON = 1e-4
+
+
+def profile(df):
+    """Feature distributions the drift check compares against."""
+    result = {"categorical": {}, "numeric": {}}
+    for col in CATEGORICAL_DRIFT_FEATURES:
+        shares = df[col].astype(str).value_counts(normalize=True)
+        result["categorical"][col] = {str(k): float(v) for k, v in shares.items()}
+    for col in NUMERIC_DRIFT_FEATURES:
+        values = df[col].dropna().to_numpy(dtype=np.float64)
+        edges = np.unique(np.quantile(values, np.linspace(0.1, 0.9, 9)))
+        result["numeric"][col] = {"edges": edges.tolist(), "shares": _bin_shares(values, edges).tolist()}
+    return result
+
+
+def _bin_shares(values, edges):
+    counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+    return counts / max(1, counts.sum())
+
+
+def psi(expected, actual):
+    expected = np.maximum(np.asarray(expected, dtype=np.float64), PSI_EPSILON)
+    actual = np.maximum(np.asarray(actual, dtype=np.float64), PSI_EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def drift_report(df, state):
+    """Row growth and per-feature PSI of ``df`` against the last training state."""
+    baseline, current = state["profile"], profile(df)
+    scores = {}
+    for col, shares in baseline["categorical"].items():
+        keys = sorted(set(shares) | set(current["categorical"][col]))
+        scores[col] = psi([shares.get(k, 0.0) for k in keys],
+                          [current["categorical"][col].get(k, 0.0) for k in keys])
+    for col, binned in baseline["numeric"].items():
+        values = df[col].dropna().to_numpy(dtype=np.float64)
+        scores[col] = psi(binned["shares"], _bin_shares(values, np.asarray(binned["edges"])))
+    return {"row_growth": len(df) / max(1, state["rows"]) - 1, "psi": scores}
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(df, events_path, path):
+    state = {
+        "rows": len(df),
+        "data_sha256": file_sha256(events_path),
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "profile": profile(df),
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(state, f, indent=2)
+    return state
+
+
+def refresh(data_dir=".", max_row_growth=0.2, max_psi=0.2, force_retrain=False, workers=1, cv=5):
+    """Bring the prediction store up to date; return a summary dict."""
+    start = time.perf_counter()
+    events_path = os.path.join(data_dir, EVENTS_FILE)
+    model_path = artifact_path(data_dir)
+    state_path = os.path.join(data_dir, TRAINING_STATE_FILE)
+    store_path = prediction_store.store_path(data_dir)
+
+    df = pd.read_csv(events_path)
+    state = load_state(state_path)
+    report = drift_report(df, state) if state else None
+    reasons = []
+    if force_retrain:
+        reasons.append("forced")
+    if not os.path.exists(model_path):
+        reasons.append("no model artifact")
+    if report and report["row_growth"] > max_row_growth:
+        reasons.append(f"row growth {report['row_growth']:.0%}")
+    if report:
+        reasons += [f"{col} PSI {score:.3f}" for col, score in report["psi"].items() if score > max_psi]
+
+    hashes = prediction_store.row_hashes(df, FEATURES)
+    if reasons:
+        results, prepared, _ = train_models.run(
+            events_path, workers, cv, cache_dir=os.path.join(data_dir, train_models.CACHE_DIR)
+        )
+        artifact = train_models.export_artifact(results, prepared, model_path)
+        save_state(df, events_path, state_path)
+        scored = prediction_store.rewrite(predict(df, artifact), hashes, artifact["created"], store_path)
+    else:
+        artifact = load_artifact(model_path)
+        if state is None:
+            # First run against an existing artifact: adopt the current data as the baseline
+            save_state(df, events_path, state_path)
+        store = prediction_store.read_store(store_path)
+        known_hash = store['Row Hash'].reindex(hashes.index)
+        known_version = store['Model Version'].reindex(hashes.index)
+        stale = (known_hash != hashes) | (known_version != artifact["created"])
+        scored = 0
+        if stale.any():
+            scored = prediction_store.append(
+                predict(df[stale.to_numpy()], artifact), hashes[stale], artifact["created"], store_path
+            )
+
+    return {
+        "rows": len(df),
+        "scored": scored,
+        "retrained": bool(reasons),
+        "reasons": reasons,
+        "drift": report,
+        "model_version": artifact["created"],
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score new or changed events and retrain only on drift.")
+    parser.add_argument("--data-dir", default=".", help="directory holding merged_output.csv and models/")
+    parser.add_argument("--max-row-growth", type=float, default=0.2,
+                        help="retrain when the event count grew by more than this fraction (default 0.2)")
+    parser.add_argument("--max-psi", type=float, default=0.2,
+                        help="retrain when a feature's PSI exceeds this value (default 0.2)")
+    parser.add_argument("--retrain", action="store_true", help="force a full retrain")
+    parser.add_argument("--workers", type=int, default=1, help="training worker processes")
+    parser.add_argument("--cv", type=int, default=5, help="cross-validation folds when retraining")
+    args = parser.parse_args()
+
+    summary = refresh(args.data_dir, args.max_row_growth, args.max_psi, args.retrain, args.workers, args.cv)
+    action = f"retrained ({', '.join(summary['reasons'])})" if summary["retrained"] else "incremental"
+    print(f"{action}: scored {summary['scored']} of {summary['rows']} events with model "
+          f"{summary['model_version']} in {summary['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Columnar (Arrow/Feather) snapshots of the CSV datasets.
+
+A snapshot is an uncompressed Arrow IPC file per dataset plus a
+``manifest.json`` holding the fingerprint (size, mtime and SHA-256) of each
+source CSV it was built from. Uncompressed IPC files can be memory-mapped, so
+categoricals keep their dictionaries and numeric columns are read without
+parsing text.
+
+Float columns are stored with NaN values rather than Arrow nulls, so reading
+them back needs no copy: the frame's numeric columns point into the mapped
+file, and every process that maps it shares the same pages of the OS page
+cache. Only the requested columns are read.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: manifest updates are not locked
+    fcntl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # snapshots are optional, the loaders fall back to CSV
+    pa = None
+    feather = None
+
+SNAPSHOT_DIR = "snapshot"
+MANIFEST_FILE = "manifest.json"
+# 2: entries record the memory of each column (column_bytes)
+MANIFEST_FORMAT = 2
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(path):
+    stat = os.stat(path)
+    return {
+        "path": os.path.basename(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(path),
+    }
+
+
+def _source_is_fresh(path, recorded):
+    if not os.path.exists(path):
+        return False
+    stat = os.stat(path)
+    if stat.st_size != recorded["size"]:
+        return False
+    if stat.st_mtime_ns == recorded["mtime_ns"]:
+        return True
+    # Touched but possibly unchanged (e.g. a fresh git checkout): compare content
+    return file_sha256(path) == recorded["sha256"]
+
+
+def read_manifest(snapshot_dir=SNAPSHOT_DIR):
+    path = os.path.join(snapshot_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {"format": MANIFEST_FORMAT, "datasets": {}}
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != MANIFEST_FORMAT:
+        return {"format": MANIFEST_FORMAT, "datasets": {}}
+    return manifest
+
+
+def _arrow_table(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        # from_pandas turns NaN into nulls, which to_pandas can only undo with a copy
+        if pa.types.is_floating(field.type) and table.column(i).null_count:
+            table = table.set_column(i, field, pa.array(df[field.name].to_numpy(), type=field.type))
+    return table
+
+
+@contextlib.contextmanager
+def _manifest_lock(snapshot_dir):
+    # Serializes read-modify-write of the manifest between worker processes
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(snapshot_dir, MANIFEST_FILE + ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _write_atomic(snapshot_dir, path, write):
+    # A unique temporary name, so several processes can build at once
+    fd, tmp_path = tempfile.mkstemp(dir=snapshot_dir, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_snapshot(name, df, sources, snapshot_dir=SNAPSHOT_DIR, fingerprints=None, **metadata):
+    """Write ``df`` as the snapshot for dataset ``name`` and record its sources.
+
+    Pass the ``fingerprints`` of the sources taken before ``df`` was read when
+    the files may change meanwhile (e.g. from a running app).
+    """
+    if feather is None:
+        raise RuntimeError("pyarrow is required to build snapshots")
+    os.makedirs(snapshot_dir, exist_ok=True)
+    fingerprints = fingerprints or [fingerprint(path) for path in sources]
+    file_name = f"{name}.arrow"
+    table = _arrow_table(df)
+    _write_atomic(snapshot_dir, os.path.join(snapshot_dir, file_name),
+                  lambda path: feather.write_feather(table, path, compression="uncompressed"))
+
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_FILE)
+    with _manifest_lock(snapshot_dir):
+        manifest = read_manifest(snapshot_dir)
+        manifest["datasets"][name] = {
+            "file": file_name,
+            "rows": len(df),
+            "sources": fingerprints,
+            **metadata,
+        }
+
+        def dump(path):
+            with open(path, "w") as f:
+                json.dump(manifest, f, indent=2)
+        _write_atomic(snapshot_dir, manifest_path, dump)
+    return manifest["datasets"][name]
+
+
+def map_snapshot(name, sources, snapshot_dir=SNAPSHOT_DIR):
+    """Return ``(table, entry)`` with the memory-mapped Arrow table of a fresh snapshot, or ``None``."""
+    if pa is None:
+        return None
+    entry = read_manifest(snapshot_dir)["datasets"].get(name)
+    if entry is None or len(entry["sources"]) != len(sources):
+        return None
+    for path, recorded in zip(sources, entry["sources"]):
+        if os.path.basename(path) != recorded["path"] or not _source_is_fresh(path, recorded):
+            return None
+    file_path = os.path.join(snapshot_dir, entry["file"])
+    if not os.path.exists(file_path):
+        return None
+    with pa.memory_map(file_path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table, entry
+
+
+def table_frame(table, columns=None):
+    """Convert ``table`` to pandas, limited to ``columns`` (in that order, skipping any it lacks).
+
+    Without ``columns``, ``table`` is consumed by the conversion.
+    """
+    if columns is not None:
+        table = table.select([col for col in columns if col in table.column_names])
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def read_snapshot(name, sources, snapshot_dir=SNAPSHOT_DIR, columns=None):
+    """Return ``(df, entry)`` from a fresh snapshot, or ``None`` if it is missing or stale.
+
+    ``columns`` limits the frame to those columns (in that order, skipping
+    any the snapshot lacks); the others are never read from the file.
+    """
+    mapped = map_snapshot(name, sources, snapshot_dir)
+    if mapped is None:
+        return None
+    table, entry = mapped
+    return table_frame(table, columns), entry
@@ -0,0 +1,79 @@
+"""Synthetic, scaled-up copies of the datasets for benchmarking.
+
+The real rows come first, followed by rows drawn with replacement from them,
+so the joint distribution of Location, Disaster Type and every other column
+matches the real data. Drawn events get a unique ``DisNo.``, and their
+coordinates are jittered by up to about 5 km so that maps and spatial bins
+do not collapse onto the original points. The two prediction CSVs are
+row-aligned with ``merged_output.csv``, so they are drawn with the same rows.
+
+    python synthetic_data.py --scale 100 --out-dir /tmp/disasters-100x
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DEADLY_FILE, EVENTS_FILE, HOUSING_FILE, SEVERITY_FILE
+
+COORDINATE_JITTER = 0.05  # degrees
+
+
+def draw_rows(rows, scale, rng):
+    """Row positions for ``scale`` times ``rows`` rows: the real rows, then random draws."""
+    total = max(1, int(round(rows * scale)))
+    kept = min(rows, total)
+    return np.concatenate([np.arange(kept), rng.integers(0, rows, total - kept)])
+
+
+def scale_events(events, positions, rng):
+    """``events`` at ``positions``, with unique ids and jittered coordinates for the drawn rows."""
+    scaled = events.take(positions).reset_index(drop=True)
+    drawn = np.arange(len(scaled)) >= len(events)
+    if 'DisNo.' in scaled.columns:
+        suffix = np.where(drawn, "-" + pd.Series(np.arange(len(scaled))).astype(str), "")
+        scaled['DisNo.'] = scaled['DisNo.'].astype(str) + suffix
+    for col in ['Latitude', 'Longitude']:
+        if col in scaled.columns:
+            noise = rng.uniform(-COORDINATE_JITTER, COORDINATE_JITTER, len(scaled))
+            scaled[col] = scaled[col] + np.where(drawn, noise, 0.0)
+    return scaled
+
+
+def write_scaled(data_dir, out_dir, scale, seed=0):
+    """Write every CSV of ``data_dir`` scaled by ``scale`` into ``out_dir``; returns {file: rows}."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    written = {}
+
+    events = pd.read_csv(os.path.join(data_dir, EVENTS_FILE))
+    positions = draw_rows(len(events), scale, rng)
+    scale_events(events, positions, rng).to_csv(os.path.join(out_dir, EVENTS_FILE), index=False)
+    written[EVENTS_FILE] = len(positions)
+    for name in [SEVERITY_FILE, DEADLY_FILE]:
+        predictions = pd.read_csv(os.path.join(data_dir, name))
+        scale_events(predictions, positions, rng).to_csv(os.path.join(out_dir, name), index=False)
+        written[name] = len(positions)
+
+    housing = pd.read_csv(os.path.join(data_dir, HOUSING_FILE))
+    housing_positions = draw_rows(len(housing), scale, rng)
+    housing.take(housing_positions).to_csv(os.path.join(out_dir, HOUSING_FILE), index=False)
+    written[HOUSING_FILE] = len(housing_positions)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default=".", help="directory holding the real CSV files")
+    parser.add_argument("--out-dir", required=True, help="where the scaled CSV files are written")
+    parser.add_argument("--scale", type=float, default=10, help="row multiplier (default: 10)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    for name, rows in write_scaled(args.data_dir, args.out_dir, args.scale, args.seed).items():
+        print(f"{name}: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
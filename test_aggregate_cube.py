@@ -0,0 +1,35 @@
+"""Key metrics from the aggregate cube for selections without any location."""
+import os
+
+import pandas as pd
+import pytest
+
+from aggregate_cube import AggregateCube
+from city_index import CityIndex
+from data_loader import DASHBOARD_COLUMNS, load_disasters
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+pytestmark = pytest.mark.skipif(not os.path.exists(os.path.join(DATA_DIR, "merged_output.csv")),
+                                reason="needs merged_output.csv")
+
+
+def _cube(df):
+    return AggregateCube(df, CityIndex(df['Location']))
+
+
+def test_no_location_in_selection():
+    df, _ = load_disasters(DATA_DIR, DASHBOARD_COLUMNS)
+    df = df.copy()
+    year = int(df['Start Year'].max())
+    df['Location'] = df['Location'].astype(object).where(df['Start Year'] != year, None)
+    cube_slice = _cube(df).slice((year, year))
+    assert cube_slice.total('Count') > 0
+    assert cube_slice.most_frequent_location() is None
+
+
+def test_most_frequent_location():
+    df, _ = load_disasters(DATA_DIR, DASHBOARD_COLUMNS)
+    cube_slice = _cube(df).slice()
+    assert cube_slice.most_frequent_location() is not None
+    assert cube_slice.location_totals()[:-1].sum() > 0
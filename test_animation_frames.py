@@ -0,0 +1,91 @@
+"""Slider jumps between non-adjacent years must show every trace's data for the target year."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from animation_frames import KEYFRAME_INTERVAL, YearFrames
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "merged_output.csv")
+
+
+def _resolve(fig, name):
+    # Same merge as plotly.js Plots.computeFrame: follow baseframe back, apply oldest first
+    frames = {frame.name: frame for frame in fig.frames}
+    chain, frame = [], frames[name]
+    while frame is not None and frame.name not in [f.name for f in chain]:
+        chain.append(frame)
+        frame = frames.get(frame.baseframe) if frame.baseframe else None
+    traces = {}
+    for frame in reversed(chain):
+        for index, trace in zip(frame.traces, frame.data):
+            traces[index] = {**traces.get(index, {}), **trace.to_plotly_json()}
+    return traces
+
+
+def _jump(fig, state, name):
+    # Plotly.animate only updates the traces of the resolved frame; the others keep their data
+    return {**state, **_resolve(fig, name)}
+
+
+def _initial_state(fig):
+    return {index: trace.to_plotly_json() for index, trace in enumerate(fig.data)}
+
+
+def _expected_counts(df, mask, year):
+    selected = df[mask & (pd.to_numeric(df['Start Year'], errors='coerce') == year)]
+    return selected['Disaster Type'].value_counts().to_dict()
+
+
+def _check_every_jump(df, mask):
+    fig = YearFrames(df).counts_figure(mask)
+    names = [trace.name for trace in fig.data]
+    years = [int(frame.name) for frame in fig.frames]
+    for start in years:
+        state = _jump(fig, _initial_state(fig), str(start))
+        for target in years:
+            if abs(target - start) == 1:
+                continue
+            after = _jump(fig, state, str(target))
+            expected = _expected_counts(df, mask, target)
+            assert sorted(after) == list(range(len(names)))
+            for index, name in enumerate(names):
+                counts = list(np.asarray(after[index]["y"], dtype=float))
+                assert counts == ([expected[name]] if name in expected else []), (start, target, name)
+                if counts:
+                    assert list(np.asarray(after[index]["x"], dtype=float)) == [target]
+
+
+def test_non_adjacent_jumps_show_every_trace():
+    rng = np.random.default_rng(0)
+    years = rng.integers(1980, 1980 + 3 * KEYFRAME_INTERVAL, 400)
+    types = rng.choice(["Earthquake", "Flood", "Storm", "Wildfire"], 400)
+    df = pd.DataFrame({'Start Year': years, 'Disaster Type': types})
+    # A type seen in a single year only, like the Epidemic bar that used to stay on screen
+    df = pd.concat([df, pd.DataFrame({'Start Year': [1980], 'Disaster Type': ["Epidemic"]})], ignore_index=True)
+    _check_every_jump(df, np.ones(len(df), dtype=bool))
+
+
+def test_scatter_frames_resolve_to_every_trace():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        'Start Year': rng.integers(1990, 2015, 200),
+        'Disaster Type': rng.choice(["Flood", "Storm", "Epidemic"], 200),
+        'Total Deaths': rng.integers(0, 50, 200).astype(float),
+        'Total Affected': rng.integers(1, 1000, 200).astype(float),
+    })
+    fig = YearFrames(df).scatter_figure(np.ones(len(df), dtype=bool), 'Total Deaths', 'Total Affected')
+    for frame in fig.frames:
+        resolved = _resolve(fig, frame.name)
+        assert sorted(resolved) == list(range(len(fig.data)))
+        year = int(frame.name)
+        for index, trace in enumerate(fig.data):
+            rows = df[(df['Start Year'] == year) & (df['Disaster Type'] == trace.name)]
+            assert sorted(np.asarray(resolved[index]["y"], dtype=float)) == sorted(rows['Total Deaths'])
+
+
+@pytest.mark.skipif(not os.path.exists(DATA_FILE), reason="needs merged_output.csv")
+def test_tabuk_jumps_on_full_dataset():
+    df = pd.read_csv(DATA_FILE, usecols=['Start Year', 'Disaster Type', 'Location'])
+    _check_every_jump(df, df['Location'].str.contains("Tabuk", na=False).to_numpy())
@@ -0,0 +1,165 @@
+"""Parallel training and hyperparameter search for the KSA disaster models.
+
+Runs Logistic Regression and Random Forest for both Is_Deadly and
+Severity_Level concurrently in a process pool, each with a cross-validated
+grid search. Results are cached per (target, model, features, params, data
+hash) under models/cache, so unchanged configurations are never retrained.
+
+    python train_models.py [--data merged_output.csv] [--workers 4] [--cv 5] [--serial | --compare] [--export]
+
+``--serial`` is the notebook's flow: one model at a time, single-threaded.
+``--compare`` trains every configuration that way and then in parallel,
+ignoring the cache, and reports the wall-clock speedup.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import GridSearchCV
+
+from disaster_model import FEATURES, FeatureEncoder, artifact_path, save_artifact
+from snapshot import file_sha256
+from training import RANDOM_STATE, TARGETS, add_targets, prepare_training_data
+
+CACHE_DIR = os.path.join("models", "cache")
+
+# family -> (estimator, fixed params, searched grid)
+MODEL_FAMILIES = {
+    "logreg": (LogisticRegression, {"max_iter": 1000}, {"C": [0.1, 1.0, 10.0]}),
+    "rf": (RandomForestClassifier, {"random_state": RANDOM_STATE},
+           {"n_estimators": [100, 200], "max_depth": [None, 20]}),
+}
+
+
+def cache_key(target, family, features, data_hash, cv):
+    _, fixed, grid = MODEL_FAMILIES[family]
+    payload = json.dumps({
+        "target": target, "family": family, "features": features,
+        "fixed": fixed, "grid": grid, "cv": cv, "data": data_hash,
+    }, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def fit_task(target, family, data, cv, n_jobs):
+    """Grid-search one model family on one target; runs inside a worker process."""
+    estimator, fixed, grid = MODEL_FAMILIES[family]
+    params = dict(fixed)
+    if family == "rf":
+        # Forests use this worker's share of the cores; the search itself stays
+        # serial so process_time() below covers all of the work
+        params["n_jobs"] = n_jobs
+
+    start, cpu_start = time.perf_counter(), time.process_time()
+    search = GridSearchCV(estimator(**params), grid, cv=cv)
+    search.fit(data["X_train"], data["y_train"])
+    return {
+        "target": target,
+        "family": family,
+        "best_params": search.best_params_,
+        "cv_accuracy": search.best_score_,
+        "test_accuracy": accuracy_score(data["y_test"], search.predict(data["X_test"])),
+        "fit_seconds": time.perf_counter() - start,
+        # Divided by the wall-clock time, how many cores the fits kept busy
+        "cpu_seconds": time.process_time() - cpu_start,
+        "model": search.best_estimator_,
+    }
+
+
+def run(data_path, workers, cv, serial=False, cache_dir=CACHE_DIR, use_cache=True):
+    df = add_targets(pd.read_csv(data_path))
+    data_hash = file_sha256(data_path)
+    encoder = FeatureEncoder(FEATURES).fit(df)
+    prepared = {target: prepare_training_data(df, target, encoder=encoder) for target in TARGETS}
+
+    os.makedirs(cache_dir, exist_ok=True)
+    results, pending = [], []
+    for target in TARGETS:
+        for family in MODEL_FAMILIES:
+            path = os.path.join(cache_dir, f"{target}-{family}-{cache_key(target, family, FEATURES, data_hash, cv)}.joblib")
+            if use_cache and os.path.exists(path):
+                results.append(dict(joblib.load(path), cached=True))
+            else:
+                pending.append((target, family, path))
+
+    start = time.perf_counter()
+    if serial:
+        # The notebook's fits: one at a time, with the estimators' default single thread
+        fresh = [fit_task(target, family, prepared[target], cv, 1) for target, family, _ in pending]
+    elif workers <= 1:
+        fresh = [fit_task(target, family, prepared[target], cv, os.cpu_count() or 1) for target, family, _ in pending]
+    else:
+        n_jobs = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(fit_task, target, family, prepared[target], cv, n_jobs)
+                       for target, family, _ in pending]
+            fresh = [future.result() for future in futures]
+    wall_seconds = time.perf_counter() - start
+
+    for (_, _, path), result in zip(pending, fresh):
+        joblib.dump(result, path, compress=3)
+        results.append(dict(result, cached=False))
+    return results, prepared, wall_seconds
+
+
+def export_artifact(results, prepared, path=None):
+    """Save the Is_Deadly logreg and Severity_Level forest, as the notebook does."""
+    best = {(r["target"], r["family"]): r["model"] for r in results}
+    deadly, severity = prepared["Is_Deadly"], prepared["Severity_Level"]
+    return save_artifact(
+        path or artifact_path(),
+        deadly_model=best[("Is_Deadly", "logreg")], deadly_scaler=deadly["scaler"],
+        deadly_encoder=deadly["encoder"],
+        severity_model=best[("Severity_Level", "rf")], severity_scaler=severity["scaler"],
+        severity_encoder=severity["encoder"], label_encoder=severity["label_encoder"],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the KSA disaster models in parallel.")
+    parser.add_argument("--data", default="merged_output.csv", help="events CSV (default: merged_output.csv)")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="worker processes")
+    parser.add_argument("--cv", type=int, default=5, help="cross-validation folds")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--serial", action="store_true", help="train one model at a time, single-threaded (baseline)")
+    mode.add_argument("--compare", action="store_true",
+                      help="time the serial baseline and the parallel run on every configuration, ignoring the cache")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="trained-model cache directory")
+    parser.add_argument("--export", action="store_true",
+                        help="write the Is_Deadly logreg and Severity_Level forest to the model artifact")
+    args = parser.parse_args()
+
+    if args.compare:
+        _, _, serial_seconds = run(args.data, args.workers, args.cv, True, args.cache_dir, use_cache=False)
+    results, prepared, wall_seconds = run(args.data, args.workers, args.cv, args.serial, args.cache_dir,
+                                          use_cache=not args.compare)
+    for result in sorted(results, key=lambda r: (r["target"], r["family"])):
+        print(f"{result['target']:<15} {result['family']:<7} cv={result['cv_accuracy']:.2%} "
+              f"test={result['test_accuracy']:.2%} fit={result['fit_seconds']:.1f}s "
+              f"{'(cached)' if result['cached'] else ''} {result['best_params']}")
+
+    trained = [r for r in results if not r["cached"]]
+    if trained:
+        cpu_seconds = sum(r["cpu_seconds"] for r in trained)
+        print(f"Trained {len(trained)} model(s) in {wall_seconds:.1f}s wall-clock "
+              f"({'serial' if args.serial else f'{args.workers} worker(s)'}), "
+              f"CPU utilisation {cpu_seconds / wall_seconds:.1f} cores")
+        if args.compare:
+            print(f"Serial baseline {serial_seconds:.1f}s wall-clock, speedup {serial_seconds / wall_seconds:.2f}x")
+    else:
+        print("All configurations cached, nothing retrained")
+
+    if args.export:
+        export_artifact(results, prepared)
+        print(f"Saved model artifact to '{artifact_path()}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Training-data preparation shared by the KSA disaster model scripts.
+
+Mirrors the preprocessing of ``predicting_disasters_in_ksa_w_ml.py``:
+target creation, one-hot encoding, SMOTE balancing, scaling and the 80/20
+split, with the same random seeds.
+"""
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from disaster_model import FEATURES, FeatureEncoder
+
+TARGETS = ['Is_Deadly', 'Severity_Level']
+RANDOM_STATE = 42
+
+
+def classify_severity(damage):
+    """Vectorized Low/Medium/High bins of Total Damage ('000 US$); missing damage counts as High."""
+    damage = np.asarray(damage, dtype=np.float64)
+    return np.select([damage < 100000, damage < 1000000], ["Low", "Medium"], default="High")
+
+
+def add_targets(df):
+    """Add the Is_Deadly and Severity_Level targets to ``df`` in place."""
+    df["Is_Deadly"] = (df["Total Deaths"] > 0).astype(int)
+    df["Severity_Level"] = classify_severity(df["Total Damage ('000 US$)"])
+    return df
+
+
+def encode_target(df, target):
+    """Target vector for ``target``, plus the label encoder for Severity_Level."""
+    if target == 'Severity_Level':
+        label_encoder = LabelEncoder()
+        return pd.Series(label_encoder.fit_transform(df[target]), index=df.index), label_encoder
+    return df[target], None
+
+
+def balance_and_split(X, y, encoder, random_state=RANDOM_STATE):
+    """SMOTE-balance, scale and split an encoded matrix; returns the arrays and the scaler."""
+    from imblearn.over_sampling import SMOTE
+
+    X_resampled, y_resampled = SMOTE(random_state=random_state).fit_resample(X, y)
+    encoder.restore_dtypes(X_resampled)
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X_resampled)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_scaled, y_resampled, test_size=0.2, random_state=random_state
+    )
+    return {
+        "X_train": X_train, "X_test": X_test,
+        "y_train": np.asarray(y_train), "y_test": np.asarray(y_test),
+        "scaler": scaler,
+    }
+
+
+def prepare_training_data(df, target, features=FEATURES, encoder=None, random_state=RANDOM_STATE):
+    """Encode, balance, scale and split ``df`` for ``target``.
+
+    Returns a dict with the train/test arrays plus the fitted encoder, scaler
+    and (for Severity_Level) label encoder needed to score new events.
+    """
+    encoder = encoder or FeatureEncoder(features).fit(df)
+    y, label_encoder = encode_target(df, target)
+    prepared = balance_and_split(encoder.transform(df), y, encoder, random_state)
+    return dict(prepared, encoder=encoder, label_encoder=label_encoder)
@@ -0,0 +1,79 @@
+"""Warm-up entry point: preload the data, then serve an app with Streamlit.
+
+    python warmup.py Group2_dashboard.py [streamlit run options, e.g. --server.port 8501]
+    python warmup.py --warm-only
+
+Before the server starts, this process imports the libraries, maps the data
+snapshot (writing it first if it is stale), and builds the per-version
+indexes, aggregates and figures with the same code as the apps. Streamlit
+then runs in this same process, so the first visitor's rerun finds
+everything in memory. Each startup phase is logged with its duration, and
+the background refresher (``data_refresher.py``) starts with the server.
+"""
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import time
+
+log = logging.getLogger("dashboard.startup")
+
+
+@contextlib.contextmanager
+def phase(name, timings):
+    start = time.perf_counter()
+    yield
+    timings[name] = time.perf_counter() - start
+    log.info("%-18s %7.3fs", name, timings[name])
+
+
+def warm_up(apps=None, data_dir="."):
+    """Run the startup phases for ``apps`` (script names; both apps by default); returns {phase: seconds}."""
+    apps = {os.path.basename(app) for app in apps} if apps else {"Group2_dashboard.py", "housing_dashboard_app.py"}
+    timings = {}
+    started = time.perf_counter()
+    with phase("imports", timings):
+        import plotly.express as px
+
+        import app_data
+    with phase("plotly", timings):
+        # The first figure loads Plotly's templates and validators
+        px.bar(x=[0], y=[0]).to_json()
+    if "Group2_dashboard.py" in apps:
+        with phase("disasters", timings):
+            load_stats = app_data.warm_disasters(data_dir)
+        log.info("disasters loaded from %s, version %s", load_stats.source, load_stats.version)
+    if "housing_dashboard_app.py" in apps:
+        with phase("housing", timings):
+            load_stats = app_data.warm_housing(data_dir)
+        log.info("housing loaded from %s, version %s", load_stats.source, load_stats.version)
+    timings["total"] = time.perf_counter() - started
+    log.info("%-18s %7.3fs", "warm-up total", timings["total"])
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("app", nargs="?", help="Streamlit script to serve (both apps are warmed when omitted)")
+    parser.add_argument("--warm-only", action="store_true", help="warm up and log the phases, then exit")
+    args, streamlit_args = parser.parse_known_args()
+    if not args.app and not args.warm_only:
+        parser.error("an app is required unless --warm-only is given")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    # The apps read their data relative to the working directory, like `streamlit run`
+    warm_up([args.app] if args.app else None)
+    if args.warm_only:
+        return
+    with phase("streamlit import", {}):
+        from streamlit.web import cli
+
+    import data_refresher
+    data_refresher.start()
+    sys.argv = ["streamlit", "run", args.app, *streamlit_args]
+    cli.main(prog_name="streamlit")
+
+
+if __name__ == "__main__":
+    main()